@@ -0,0 +1,347 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from Timing import Records, Summarize
+from Workspace import WriteAtomic
+
+logging.basicConfig(level=logging.INFO)
+
+BASELINE_FILE = "./benchmarks/baseline.json"  # Tracked, commit it after --save-baseline on the reference machine
+REGRESSION_THRESHOLD = 0.15  # Median slowdown against the baseline that counts as a regression
+BENCHMARK_REPEATS = 3  # Timed runs per case, after one untimed warm-up run
+IMAGE_SIZES = [(720, 900), (1080, 1350), (2160, 2700)]
+VIDEO_SIZES = [(720, 1280), (1080, 1920)]
+RESIZE_BATCHES = [8, 32]
+RESIZE_SOURCE_SIZE = (2160, 2700)  # Downscaled to Scraper.TARGET_SIZE
+QUOTE_LENGTHS = [50, 150, 600]
+CLIP_SECONDS = 5  # Length of the synthetic music and template clips
+FORMAT_CALLS = 1000  # FormatQuote calls per timed run
+PROBE_CALLS = 10  # GetDuration calls per timed run
+BENCHMARK_MUSIC_URL = "https://youtu.be/benchmark"  # Key the synthetic music is cached under
+SAMPLE_QUOTE = (
+    "The happiness of your life depends upon the quality of your thoughts: therefore, guard accordingly, "
+    "and take care that you entertain no notions unsuitable to virtue and reasonable nature."
+)
+
+
+def _FFmpeg(*arguments: str) -> None:
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *arguments], check=True)
+
+
+def MakeImage(path: str, size: tuple, seed: int = 0) -> str:
+    """Writes a noisy gradient JPEG with no text in it, so PictureVideo takes the overlay path."""
+    import numpy as np
+    from PIL import Image
+
+    width, height = size
+    rng = np.random.default_rng(seed)
+    pixels = np.empty((height, width, 3), np.int16)
+    pixels[..., 0] = np.linspace(0, 255, width, dtype=np.int16)
+    pixels[..., 1] = np.linspace(0, 255, height, dtype=np.int16)[:, None]
+    pixels[..., 2] = 128
+    pixels += rng.integers(-24, 24, pixels.shape, dtype=np.int16)
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(path, quality=90)
+    return path
+
+
+def MakeMusic(path: str, seconds: int = CLIP_SECONDS) -> str:
+    """Writes an MP3 sine tone with ffmpeg's lavfi source."""
+    _FFmpeg("-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}", "-c:a", "libmp3lame", "-q:a", "4", path)
+    return path
+
+
+def MakeTemplate(path: str, size: tuple, seconds: int = CLIP_SECONDS) -> str:
+    """Writes a test-pattern template video with a sine soundtrack."""
+    width, height = size
+    _FFmpeg(
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=30:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path,
+    )
+    return path
+
+
+def SeedMusic(music_file: str, seconds: int = CLIP_SECONDS) -> tuple:
+    """
+    Stores a local audio file in the music cache under BENCHMARK_MUSIC_URL.
+
+    Returns:
+        tuple: (url, start, end) that GetCachedMusic resolves to the file without downloading.
+    """
+    from Music import SegmentKey, StoreSegment
+
+    copy = f"{music_file}.seed.mp3"
+    shutil.copyfile(music_file, copy)  # StoreSegment moves its input into the cache
+    StoreSegment(SegmentKey(BENCHMARK_MUSIC_URL, 0, seconds), copy, "benchmark", seconds)
+    return BENCHMARK_MUSIC_URL, "00:00", f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def TimeCase(
+    function: Callable[[], object],
+    repeats: int = BENCHMARK_REPEATS,
+    calls: int = 1,
+    setup: Optional[Callable[[], None]] = None,
+) -> dict:
+    """
+    Times a benchmark case.
+
+    The first run warms caches and lazy imports and is not counted. Stage times come from
+    the Timing spans the case finished during the timed runs.
+
+    Parameters:
+        function (Callable[[], object]): Work to time. Raises on failure.
+        repeats (int): Timed runs.
+        calls (int): Calls per run, for functions too fast to time one at a time.
+        setup (Optional[Callable[[], None]]): Untimed preparation before every run.
+
+    Returns:
+        dict: Median, min and max seconds per call, plus mean seconds per stage.
+    """
+    times = []
+    timed_from = None
+    for run in range(repeats + 1):
+        if setup:
+            setup()
+        if run == 1:
+            timed_from = time.time()
+        started = time.perf_counter()
+        for _ in range(calls):
+            function()
+        if run:
+            times.append((time.perf_counter() - started) / calls)
+
+    stages = Summarize([record for record in Records() if record["start"] >= timed_from])
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "runs": repeats,
+        "stages": {span: stats["total"] / repeats for span, stats in sorted(stages.items())},
+    }
+
+
+def _Succeeded(result):
+    """Raises for the None that render functions return after logging a failure."""
+    if result is None:
+        raise RuntimeError("returned None, see the log above")
+    return result
+
+
+def RunBenchmarks(
+    font_path: str,
+    repeats: int = BENCHMARK_REPEATS,
+    only: Optional[List[str]] = None,
+    quick: bool = False,
+) -> dict:
+    """
+    Generates synthetic inputs and times the render hot paths on them.
+
+    Everything runs inside a scratch directory, so the music cache, job workspaces, resize
+    state, template catalog and encoder calibration of the checkout are neither used nor
+    touched, and runs on different machines use the same default profile settings. No
+    network is used: the music segment is a local sine tone seeded into the cache.
+    PictureVideo runs the text detector on the CPU, so its model files must already be
+    downloaded. Cases that need ffmpeg are skipped when it is not installed.
+
+    Parameters:
+        font_path (str): Font file for the quote overlays.
+        repeats (int): Timed runs per case.
+        only (Optional[List[str]]): Run only cases whose name contains one of these strings.
+        quick (bool): Use the smallest size and batch of every case.
+
+    Returns:
+        dict: {"machine": ..., "cases": {name: timings or {"error": ...}}}.
+    """
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""  # Keep the text detector on the CPU
+    font_path = os.path.abspath(font_path)
+    has_font = os.path.isfile(font_path)
+    has_ffmpeg = bool(shutil.which("ffmpeg") and shutil.which("ffprobe"))
+    if not has_font:
+        logging.warning(f"Font file not found: {font_path}, skipping the quote overlay cases")
+    if not has_ffmpeg:
+        logging.warning("ffmpeg or ffprobe not found, skipping the video cases")
+
+    image_sizes = IMAGE_SIZES[:1] if quick else IMAGE_SIZES
+    video_sizes = VIDEO_SIZES[:1] if quick else VIDEO_SIZES
+    batches = RESIZE_BATCHES[:1] if quick else RESIZE_BATCHES
+    quote_lengths = QUOTE_LENGTHS[:1] if quick else QUOTE_LENGTHS
+
+    cases: Dict[str, dict] = {}
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="mediamate_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            import Scraper
+            import Video
+
+            def Run(name: str, needs: bool, function: Callable[[], object], **options) -> None:
+                if not needs or (only and not any(pattern in name for pattern in only)):
+                    return
+                logging.info(f"Benchmarking {name}")
+                try:
+                    cases[name] = TimeCase(function, repeats, **options)
+                    logging.info(f"{name}: {cases[name]['median'] * 1000:.3f} ms median")
+                except Exception as e:
+                    logging.error(f"Benchmark {name} failed: {e}")
+                    cases[name] = {"error": str(e)}
+
+            for length in quote_lengths:
+                quote = (SAMPLE_QUOTE * (length // len(SAMPLE_QUOTE) + 1))[:length]
+                Run(f"FormatQuote/{length} chars", True, lambda quote=quote: Video.FormatQuote(quote), calls=FORMAT_CALLS)
+
+            for width, height in image_sizes:
+                image = MakeImage(f"image_{width}x{height}.jpg", (width, height))
+                Run(
+                    f"OverlayQuote/{width}x{height}",
+                    has_font,
+                    lambda image=image: Video.OverlayQuote(image, SAMPLE_QUOTE, "overlay.jpg", font_path),
+                )
+
+            source = MakeImage("resize_source.jpg", RESIZE_SOURCE_SIZE)
+            for batch in batches:
+                folder = os.path.abspath(f"resize_{batch}")
+
+                def Fill(folder=folder, batch=batch) -> None:
+                    # Fresh copies with new mtimes, so nothing is skipped as already resized
+                    shutil.rmtree(folder, ignore_errors=True)
+                    os.makedirs(folder)
+                    for number in range(batch):
+                        shutil.copyfile(source, os.path.join(folder, f"{number}.jpg"))
+                    if os.path.exists(Scraper.RESIZE_STATE_FILE):
+                        os.remove(Scraper.RESIZE_STATE_FILE)
+
+                Run(f"ResizeImages/{batch} images", True, lambda folder=folder: Scraper.ResizeImages(folder), setup=Fill)
+
+            if has_ffmpeg:
+                music = MakeMusic("music.mp3")
+                Run("GetDuration", True, lambda: Video.GetDuration(music), calls=PROBE_CALLS)
+
+                for width, height in video_sizes:
+                    template = MakeTemplate(f"template_{width}x{height}.mp4", (width, height))
+                    Run(
+                        f"TemplateVideo/{width}x{height}",
+                        has_font,
+                        lambda template=template: _Succeeded(Video.TemplateVideo(SAMPLE_QUOTE, template, font_path, "Videos")),
+                    )
+
+                music_url, music_start, music_end = SeedMusic(music)
+                for width, height in image_sizes:
+                    image = os.path.abspath(f"image_{width}x{height}.jpg")
+                    if not os.path.exists(image):
+                        MakeImage(image, (width, height))
+                    Run(
+                        f"PictureVideo/{width}x{height}",
+                        has_font,
+                        lambda image=image: _Succeeded(
+                            Video.PictureVideo(image, music_start, music_end, music_url, SAMPLE_QUOTE, font_path, "Videos")
+                        ),
+                    )
+        finally:
+            os.chdir(original_directory)
+
+    return {"created": time.time(), "machine": MachineInfo(), "cases": cases}
+
+
+def MachineInfo() -> dict:
+    """Describes the machine a run was made on, so comparisons across machines can be flagged."""
+    try:
+        ffmpeg = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.split("\n")[0]
+    except OSError:
+        ffmpeg = None
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "ffmpeg": ffmpeg,
+    }
+
+
+def CompareResults(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> List[dict]:
+    """
+    Compares the median of every case found in both runs.
+
+    Parameters:
+        results (dict): Current run, as returned by RunBenchmarks.
+        baseline (dict): Stored run to compare against.
+        threshold (float): Fractional slowdown that counts as a regression, e.g. 0.15 for 15%.
+
+    Returns:
+        List[dict]: Per case: baseline and current median, their ratio and whether it regressed.
+    """
+    rows = []
+    for name, case in results["cases"].items():
+        previous = baseline.get("cases", {}).get(name, {})
+        if "median" not in case or "median" not in previous:
+            continue
+        ratio = case["median"] / previous["median"]
+        rows.append(
+            {
+                "case": name,
+                "baseline": previous["median"],
+                "current": case["median"],
+                "ratio": ratio,
+                "regressed": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def _WriteJSON(path: str, data: dict) -> None:
+    with WriteAtomic(path) as f:
+        json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the render hot paths on synthetic inputs, offline.")
+    parser.add_argument("--font", default="Roboto-Medium.ttf", help="Font file for the quote overlays")
+    parser.add_argument("--repeats", type=int, default=BENCHMARK_REPEATS, help="Timed runs per case")
+    parser.add_argument("--only", action="append", help="Run only cases whose name contains this; repeatable")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest size and batch of every case")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Slowdown that fails the run, e.g. 0.15")
+    args = parser.parse_args()
+
+    results = RunBenchmarks(args.font, args.repeats, args.only, args.quick)
+    if args.output:
+        _WriteJSON(args.output, results)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    comparison = {row["case"]: row for row in CompareResults(results, baseline, args.threshold)} if baseline else {}
+    if baseline and baseline.get("machine") != results["machine"]:
+        logging.warning("The baseline was recorded on a different machine or ffmpeg build")
+
+    for name, case in results["cases"].items():
+        if "error" in case:
+            print(f"{name:<32} failed: {case['error']}")
+            continue
+        line = f"{name:<32} {case['median'] * 1000:>10.3f} ms"
+        row = comparison.get(name)
+        if row:
+            line += f"  {row['baseline'] * 1000:>10.3f} ms baseline  {row['ratio'] - 1:>+7.1%}"
+            line += "  REGRESSION" if row["regressed"] else ""
+        print(line)
+
+    if args.save_baseline:
+        _WriteJSON(args.baseline, results)
+        logging.info(f"Saved baseline to {args.baseline}")
+    regressions = [row["case"] for row in comparison.values() if row["regressed"]]
+    if regressions:
+        logging.error(f"{len(regressions)} cases regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+    failed = [name for name, case in results["cases"].items() if "error" in case]
+    sys.exit(1 if regressions or failed else 0)
@@ -0,0 +1,328 @@
+import argparse
+import csv
+import functools
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from Jobs import DONE, RUNNING, AskParent, DescribeProgress, JobExecutor
+from Timing import TIMINGS_ENV, LoadRecords, WritePrometheus
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_FONT = "Roboto-Medium.ttf"
+DEFAULT_WORKERS = 2
+PROGRESS_LOG_INTERVAL = 5.0  # Seconds between progress lines per job
+
+
+def _Outputs(value: str) -> Optional[List[str]]:
+    """Parses a comma-separated list of aspect ratios, e.g. "9:16,1:1"."""
+    return [aspect.strip() for aspect in value.split(",") if aspect.strip()] or None
+
+
+def _Size(value: str) -> tuple:
+    """Parses a WIDTHxHEIGHT size, e.g. "1080x1350"."""
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def _Bool(value) -> bool:
+    return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def _Quote() -> str:
+    """Takes a quote from this process's prefetcher, so render workers don't each start one."""
+    from Quote import GetQuote
+
+    return GetQuote()
+
+
+# Each command maps job fields to the keyword arguments of the function that runs it.
+# Fields are (name, parameter, type, default, help); a default of ... marks a required field.
+# Targets are imported by RunCommand when a job runs, in the worker that runs it, so the CLI
+# process itself never loads Pillow or numpy.
+# "providers" are computed in this process only when a job asks for them; the function gets a
+# lazy "<name>_source" argument for each, e.g. quote_source for a picture without text.
+# "require_result" marks functions that log their errors and return None instead of raising.
+COMMANDS: Dict[str, dict] = {
+    "template": {
+        "help": "Overlay a quote on a template video",
+        "target": ("CLI", "RenderTemplate"),
+        "kind": "thread",  # ffmpeg does the work in its own process
+        "providers": {"quote": _Quote},
+        "require_result": True,
+        "fields": [
+            ("template", "template_file", str, ..., "Template video file"),
+            ("quote", "quote", str, None, "Quote text; fetched when omitted"),
+            ("font", "font_path", str, DEFAULT_FONT, "Font file"),
+            ("output_dir", "output_dir", str, "./Videos", "Output directory"),
+            ("profile", "profile", str, "social", "Render profile: draft, social or archive"),
+            ("outputs", "outputs", _Outputs, None, "Comma-separated aspect ratios, e.g. 9:16,1:1"),
+        ],
+    },
+    "picture": {
+        "help": "Turn an image and a music clip into a video",
+        "target": ("Video", "PictureVideo"),
+        "kind": "process",  # OCR and the quote overlay are CPU work in Python
+        "providers": {"quote": _Quote},
+        "require_result": True,
+        "fields": [
+            ("image", "image_path", str, ..., "Image file"),
+            ("start", "music_start", str, ..., "Music start, MM:SS or HH:MM:SS"),
+            ("end", "music_end", str, ..., "Music end, MM:SS or HH:MM:SS"),
+            ("music_url", "MUSICURL", str, ..., "YouTube URL of the music"),
+            ("quote", "quote", str, None, "Quote text; fetched when omitted and the image has no text"),
+            ("font", "font_path", str, DEFAULT_FONT, "Font file"),
+            ("output_dir", "output_dir", str, "./Videos", "Output directory"),
+            ("profile", "profile", str, "social", "Render profile: draft, social or archive"),
+            ("outputs", "outputs", _Outputs, None, "Comma-separated aspect ratios, e.g. 9:16,1:1"),
+        ],
+    },
+    "scrape": {
+        "help": "Download the images of a board or profile",
+        "target": ("Scraper", "ScrapeImages"),
+        "kind": "thread",
+        "require_result": True,
+        "fields": [
+            ("url", "url", str, ..., "Board or profile URL"),
+            ("folder", "folder", str, ..., "Folder to save images to"),
+            ("max", "MAX", int, None, "Maximum pages or scrolls"),
+            ("backend", "backend", str, "auto", "auto, http or selenium"),
+            ("resize", "resize", _Size, None, "Resize images to WIDTHxHEIGHT while downloading"),
+            ("headless", "headless", _Bool, True, "Run Chrome without a window (selenium backend)"),
+        ],
+    },
+    "voice": {
+        "help": "Download a voice sample from YouTube",
+        "target": ("General", "DownloadVoice"),
+        "kind": "thread",
+        "fields": [
+            ("url", "URL", str, ..., "YouTube URL"),
+            ("name", "Name", str, ..., "Voice name"),
+        ],
+    },
+    "tts": {
+        "help": "Generate speech with a cloned voice",
+        "target": ("General", "GenerateTTS"),
+        "kind": "thread",  # Keeps the loaded model for the following jobs
+        "fields": [
+            ("text", "text", str, ..., "Text to speak"),
+            ("speaker", "speaker", str, ..., "Speaker WAV file or voice name"),
+            ("filename", "filename", str, ..., "Output audio file"),
+        ],
+    },
+}
+
+
+def RenderTemplate(
+    template_file: str, quote: Optional[str] = None, quote_source: Optional[Callable[[], str]] = None, **kwargs
+) -> Optional[str]:
+    """Runs TemplateVideo, taking a quote from quote_source (default _Quote) when none is given."""
+    from Video import TemplateVideo
+
+    if not os.path.isfile(template_file):
+        raise FileNotFoundError(f"Template file not found: {template_file}")
+    return TemplateVideo(quote or (quote_source or _Quote)(), template_file, **kwargs)
+
+
+def RunCommand(command: str, **arguments):
+    """Imports a command's target function and calls it. Runs inside the job, so in the worker for process jobs."""
+    module, function = COMMANDS[command]["target"]
+    return getattr(importlib.import_module(module), function)(**arguments)
+
+
+def JobArguments(command: str, values: dict) -> dict:
+    """
+    Converts a job's fields into keyword arguments for the command's function.
+
+    Raises:
+        ValueError: If the command is unknown or a required field is missing.
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"Unknown command: {command}. Choose from {', '.join(COMMANDS)}.")
+    arguments = {}
+    for name, parameter, kind, default, _ in COMMANDS[command]["fields"]:
+        value = values.get(name)
+        if value is None or value == "":
+            if default is ...:
+                raise ValueError(f"{command} job is missing required field: {name}")
+            arguments[parameter] = default
+        else:
+            arguments[parameter] = value if kind is str or not isinstance(value, str) else kind(value)
+    return arguments
+
+
+def LoadJobFile(path: str) -> List[dict]:
+    """
+    Reads a job file.
+
+    JSON files hold a list of jobs, or {"jobs": [...]}. CSV files have a header row. Every job
+    has a "command" field plus the fields of that command, named as in the command line
+    options (e.g. template, quote, output_dir). Empty CSV cells use the defaults.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            return list(csv.DictReader(f))
+        jobs = json.load(f)
+    return jobs["jobs"] if isinstance(jobs, dict) else jobs
+
+
+def RunJobs(jobs: List[dict], workers: int = DEFAULT_WORKERS) -> List[dict]:
+    """
+    Runs jobs concurrently and waits for all of them.
+
+    Parameters:
+        jobs (List[dict]): Jobs with a "command" field and that command's fields.
+        workers (int): Jobs run at once on each of the thread and process pools.
+
+    Returns:
+        List[dict]: One result per job, in order: command, status, seconds, result and error.
+    """
+    logged: Dict[int, float] = {}
+
+    def LogProgress(job) -> None:
+        if job.status != RUNNING or not job.progress:
+            return
+        now = time.monotonic()
+        if now - logged.get(job.id, 0.0) >= PROGRESS_LOG_INTERVAL:
+            logged[job.id] = now
+            logging.info(f"{job.name}: {DescribeProgress(job.progress)}")
+
+    executor = JobExecutor(threads=workers, processes=workers, notify=LogProgress)
+    submitted = []
+    for number, values in enumerate(jobs, 1):
+        command = (values.get("command") or "").strip()
+        try:
+            arguments = JobArguments(command, values)
+        except ValueError as e:
+            submitted.append((number, command, None, str(e)))
+            continue
+        spec = COMMANDS[command]
+        job = executor.Submit(
+            f"{command} #{number}",
+            functools.partial(RunCommand, command),
+            kind=spec["kind"],
+            providers=spec.get("providers"),
+            require_result=spec.get("require_result", False),
+            **arguments,
+            **{f"{name}_source": functools.partial(AskParent, name) for name in spec.get("providers", {})},
+        )
+        submitted.append((number, command, job, None))
+
+    results = []
+    try:
+        for number, command, job, error in submitted:
+            if job is None:
+                results.append({"job": number, "command": command, "status": "invalid", "seconds": 0.0, "result": None, "error": error})
+                continue
+            job.Wait()
+            results.append(
+                {
+                    "job": number,
+                    "command": command,
+                    "status": job.status,
+                    "seconds": round(job.elapsed, 2),
+                    "result": job.result,
+                    "error": str(job.error) if job.error else None,
+                }
+            )
+    finally:
+        executor.Shutdown(wait=True)
+    return results
+
+
+def PrintSummary(results: List[dict], as_json: bool = False) -> None:
+    if as_json:
+        json.dump(results, sys.stdout, indent=2, default=str)
+        print()
+        return
+    for result in results:
+        detail = result["error"] or result["result"] or ""
+        print(f"#{result['job']:<4} {result['command']:<9} {result['status']:<9} {result['seconds']:>8.1f}s  {detail}")
+    succeeded = sum(result["status"] == DONE for result in results)
+    print(f"{succeeded}/{len(results)} jobs succeeded")
+
+
+def BuildParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mediamate", description="Render quote videos and prepare their inputs without the GUI.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Jobs to run at once")
+    parser.add_argument("--json", action="store_true", help="Print the job summary as JSON")
+    parser.add_argument("--timings", help="Append per-stage timings to this JSON lines file")
+    parser.add_argument("--metrics", help="Write per-stage timings to this Prometheus text file when the jobs finish")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command, spec in COMMANDS.items():
+        subparser = commands.add_parser(command, help=spec["help"])
+        for name, _, kind, default, help_text in spec["fields"]:
+            option = f"--{name.replace('_', '-')}"
+            if default is ...:
+                subparser.add_argument(option, dest=name, required=True, help=help_text)
+            else:
+                subparser.add_argument(option, dest=name, help=f"{help_text} (default: {default})")
+
+    batch = commands.add_parser("batch", help="Run every job in a JSON or CSV job file")
+    batch.add_argument("job_file")
+
+    watch = commands.add_parser("watch", help="Turn images dropped into an inbox folder into picture videos")
+    watch.add_argument("--music-url", required=True, help="YouTube URL of the music")
+    watch.add_argument("--start", required=True, help="Music start, MM:SS or HH:MM:SS")
+    watch.add_argument("--end", required=True, help="Music end, MM:SS or HH:MM:SS")
+    watch.add_argument("--inbox", default="./Pictures/Inbox")
+    watch.add_argument("--archive", default="./Pictures/Archive")
+    watch.add_argument("--failed", default="./Pictures/Failed")
+    watch.add_argument("--output-dir", default="./Videos")
+    watch.add_argument("--font", default=DEFAULT_FONT)
+    watch.add_argument("--quote", help="Quote for every image without text; fetched per video when omitted")
+    watch.add_argument("--profile", default="social")
+    watch.add_argument("--outputs", type=_Outputs, help="Comma-separated aspect ratios, e.g. 9:16,1:1")
+    watch.add_argument("--debounce", type=float, default=1.0, help="Seconds a file must be unchanged")
+    watch.add_argument("--poll", action="store_true", help="Poll the inbox instead of using inotify")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = BuildParser().parse_args(argv)
+    timings = args.timings
+    if args.metrics and not timings:
+        descriptor, timings = tempfile.mkstemp(prefix="mediamate-", suffix=".jsonl")
+        os.close(descriptor)
+    if timings:
+        # Set before any worker is spawned so pool processes inherit it
+        os.environ[TIMINGS_ENV] = os.path.abspath(timings)
+    try:
+        return _Run(args)
+    finally:
+        if args.metrics and os.path.exists(timings):
+            WritePrometheus(args.metrics, LoadRecords(timings))
+        if timings and not args.timings:
+            os.remove(timings)
+
+
+def _Run(args: argparse.Namespace) -> int:
+    if args.command == "watch":
+        from Watch import WatchInbox
+
+        WatchInbox(
+            args.music_url, args.start, args.end,
+            inbox=args.inbox, archive=args.archive, failed=args.failed, output_dir=args.output_dir,
+            font_path=args.font, quote=args.quote, profile=args.profile, outputs=args.outputs,
+            workers=args.workers, debounce=args.debounce, polling=args.poll,
+        )
+        return 0
+    if args.command == "batch":
+        jobs = LoadJobFile(args.job_file)
+    else:
+        jobs = [{"command": args.command, **{key: value for key, value in vars(args).items() if key not in ("command", "workers", "json", "timings", "metrics")}}]
+
+    results = RunJobs(jobs, args.workers)
+    PrintSummary(results, args.json)
+    return 0 if all(result["status"] == DONE for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from Workspace import IMAGE_EXTENSIONS, FileLock, WriteAtomic
+
+logging.basicConfig(level=logging.INFO)
+
+PHASH_INDEX_FILE = "./Cache/phash.json"
+DUPLICATE_THRESHOLD = 6  # Maximum differing bits out of 64 for two images to count as the same
+DUPLICATES_DIR = "Duplicates"
+
+
+def DHash(image: Union[str, bytes, Image.Image], hash_size: int = 8) -> int:
+    """
+    Computes the difference hash of an image: one bit per adjacent-pixel brightness gradient.
+
+    The hash survives rescaling, recompression and small crops, so reposts of the same
+    picture at different sizes land within a few bits of each other.
+
+    Parameters:
+        image (Union[str, bytes, Image.Image]): Image path, encoded image bytes or a PIL image.
+        hash_size (int): Width of the gradient grid; the hash has hash_size**2 bits.
+
+    Returns:
+        int: The hash as an integer.
+    """
+    if isinstance(image, Image.Image):
+        return _DHash(image, hash_size)
+    source = io.BytesIO(image) if isinstance(image, bytes) else image
+    with Image.open(source) as opened:
+        opened.draft("L", (hash_size * 4, hash_size * 4))  # JPEGs decode at a fraction of full size
+        return _DHash(opened, hash_size)
+
+
+def _DHash(image: Image.Image, hash_size: int) -> int:
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def HammingDistance(a: int, b: int) -> int:
+    """Returns the number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class MultiIndexHash:
+    """
+    Multi-index hash table for radius searches over 64-bit hashes under Hamming distance.
+
+    Each hash is split into radius + 1 bit ranges with one table per range. Two hashes
+    within the radius must agree exactly on at least one range, so a search only compares
+    the query against hashes that share a bucket with it instead of the whole index.
+    """
+
+    def __init__(self, radius: int = DUPLICATE_THRESHOLD, bits: int = 64):
+        self.radius = radius
+        chunks = radius + 1
+        bounds = [bits * i // chunks for i in range(chunks + 1)]
+        self._ranges = [(low, (1 << (high - low)) - 1) for low, high in zip(bounds, bounds[1:])]
+        self._tables: List[Dict[int, set]] = [{} for _ in self._ranges]
+        self._values: Dict[int, list] = {}
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self._values.values())
+
+    def Add(self, value_hash: int, value) -> None:
+        """Adds a value under its hash."""
+        if value_hash not in self._values:
+            self._values[value_hash] = []
+            for table, (shift, mask) in zip(self._tables, self._ranges):
+                table.setdefault((value_hash >> shift) & mask, set()).add(value_hash)
+        self._values[value_hash].append(value)
+
+    def Search(self, query: int, radius: Optional[int] = None) -> List[Tuple[int, object]]:
+        """Returns (distance, value) for every value within radius of the query, nearest first."""
+        radius = self.radius if radius is None else min(radius, self.radius)
+        candidates = set()
+        for table, (shift, mask) in zip(self._tables, self._ranges):
+            candidates.update(table.get((query >> shift) & mask, ()))
+        results = []
+        for candidate in candidates:
+            distance = HammingDistance(query, candidate)
+            if distance <= radius:
+                results.extend((distance, value) for value in self._values[candidate])
+        return sorted(results, key=lambda result: result[0])
+
+
+def _LoadIndexFile() -> dict:
+    try:
+        with open(PHASH_INDEX_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+class PictureIndex:
+    """
+    Perceptual-hash index of one picture folder, used to reject near-duplicates at ingest.
+
+    Hashes are cached in PHASH_INDEX_FILE by path, size and mtime so only new or changed
+    files are hashed when the index is opened. One instance may be shared between threads.
+    """
+
+    def __init__(self, folder: str, threshold: int = DUPLICATE_THRESHOLD):
+        self.folder = os.path.abspath(folder)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._hashes = MultiIndexHash(threshold)
+        self._entries: Dict[str, list] = {}  # name -> [hash, size, mtime]
+
+        cached = _LoadIndexFile().get(self.folder, {})
+        if os.path.isdir(self.folder):
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not (entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)):
+                        continue
+                    stat = entry.stat()
+                    known = cached.get(entry.name)
+                    if known and known[1:] == [stat.st_size, stat.st_mtime]:
+                        value_hash = known[0]
+                    else:
+                        try:
+                            value_hash = DHash(entry.path)
+                        except Exception as e:
+                            logging.error(f"Failed to hash image {entry.path}: {e}")
+                            continue
+                    self._entries[entry.name] = [value_hash, stat.st_size, stat.st_mtime]
+                    self._hashes.Add(value_hash, entry.name)
+
+    def FindDuplicate(self, value_hash: int) -> Optional[str]:
+        """Returns the path of the nearest indexed image within the threshold, if any."""
+        with self._lock:
+            matches = self._hashes.Search(value_hash, self.threshold)
+        return os.path.join(self.folder, matches[0][1]) if matches else None
+
+    def CheckAndAdd(self, path: str, value_hash: int) -> Optional[str]:
+        """
+        Adds an image unless a near-duplicate is already indexed.
+
+        Returns:
+            Optional[str]: Path of the existing near-duplicate, or None if the image was added.
+        """
+        with self._lock:
+            matches = self._hashes.Search(value_hash, self.threshold)
+            if matches:
+                return os.path.join(self.folder, matches[0][1])
+            name = os.path.basename(path)
+            self._entries[name] = [value_hash, None, None]
+            self._hashes.Add(value_hash, name)
+        return None
+
+    def Save(self) -> None:
+        """Writes the hashes of the folder's files to PHASH_INDEX_FILE."""
+        entries = {}
+        with self._lock:
+            for name, (value_hash, _, _) in self._entries.items():
+                path = os.path.join(self.folder, name)
+                if os.path.isfile(path):
+                    stat = os.stat(path)
+                    entries[name] = [value_hash, stat.st_size, stat.st_mtime]
+        with FileLock(f"{PHASH_INDEX_FILE}.lock"):
+            index = _LoadIndexFile()
+            index[self.folder] = entries
+            with WriteAtomic(PHASH_INDEX_FILE) as f:
+                json.dump(index, f)
+
+
+def DedupeFolder(folder: str, threshold: int = DUPLICATE_THRESHOLD, dry_run: bool = False) -> List[List[str]]:
+    """
+    Finds groups of near-duplicate images in a folder and moves all but the largest of each aside.
+
+    Duplicates are moved into a "Duplicates" subfolder rather than deleted.
+
+    Parameters:
+        folder (str): Picture folder to clean up.
+        threshold (int): Maximum Hamming distance between hashes of duplicates.
+        dry_run (bool): Only report the groups without moving anything.
+
+    Returns:
+        List[List[str]]: Groups of duplicate paths, the kept image first.
+    """
+    hashes = {}
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(path) and name.lower().endswith(IMAGE_EXTENSIONS):
+            try:
+                with Image.open(path) as image:
+                    area = image.width * image.height
+                    image.draft("L", (32, 32))
+                    hashes[path] = (_DHash(image, 8), area)
+            except Exception as e:
+                logging.error(f"Failed to hash image {path}: {e}")
+
+    index = MultiIndexHash(threshold)
+    for path, (value_hash, _) in hashes.items():
+        index.Add(value_hash, path)
+
+    groups = []
+    seen = set()
+    for path, (value_hash, _) in hashes.items():
+        if path in seen:
+            continue
+        group = [match for _, match in index.Search(value_hash, threshold) if match not in seen]
+        seen.update(group)
+        if len(group) > 1:
+            # Keep the highest resolution copy
+            group.sort(key=lambda member: hashes[member][1], reverse=True)
+            groups.append(group)
+
+    duplicates_dir = os.path.join(folder, DUPLICATES_DIR)
+    for group in groups:
+        logging.info(f"Keeping {group[0]}, duplicates: {', '.join(group[1:])}")
+        if dry_run:
+            continue
+        os.makedirs(duplicates_dir, exist_ok=True)
+        for duplicate in group[1:]:
+            shutil.move(duplicate, os.path.join(duplicates_dir, os.path.basename(duplicate)))
+
+    logging.info(f"Found {sum(len(group) - 1 for group in groups)} duplicates in {len(groups)} groups")
+    return groups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move near-duplicate images out of picture folders.")
+    parser.add_argument("folders", nargs="+")
+    parser.add_argument("--threshold", type=int, default=DUPLICATE_THRESHOLD)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    for folder in args.folders:
+        DedupeFolder(folder, args.threshold, args.dry_run)
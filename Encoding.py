@@ -0,0 +1,300 @@
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from Workspace import WriteAtomic
+
+logging.basicConfig(level=logging.INFO)
+
+# Named x264 render profiles. "still_fps" is used when the video is a looped still image,
+# where every extra frame is identical and only costs encode time. -tune stillimage and the
+# GOP keep a low still rate seekable, so only "archive" keeps its full frame rate.
+PROFILES: Dict[str, dict] = {
+    "draft": {
+        "preset": "ultrafast",
+        "crf": 30,
+        "fps": 24,
+        "still_fps": 5,
+        "gop": 250,
+        "audio": "copy",
+        "target_ssim": 0.90,  # Quality floor used by CalibrateEncoder
+        "size_budget": 0.50,  # Extra bitrate over "preset" CalibrateEncoder accepts for speed
+        "faststart": False,
+    },
+    "social": {
+        "preset": "veryfast",
+        "crf": 23,
+        "fps": 30,
+        "still_fps": 5,
+        "gop": 60,
+        "audio": "aac",
+        "audio_bitrate": "192k",
+        "target_ssim": 0.95,  # Quality floor used by CalibrateEncoder
+        "size_budget": 0.15,  # Extra bitrate over "preset" CalibrateEncoder accepts for speed
+        "faststart": True,
+    },
+    "archive": {
+        "preset": "slow",
+        "crf": 18,
+        "fps": 30,
+        "still_fps": 30,
+        "gop": 120,
+        "audio": "copy",
+        "target_ssim": 0.98,  # Quality floor used by CalibrateEncoder
+        "size_budget": 0.05,  # Extra bitrate over "preset" CalibrateEncoder accepts for speed
+        "faststart": True,
+    },
+}
+DEFAULT_PROFILE = "social"
+
+# Output canvases for multi-aspect renders, as (width, height).
+ASPECT_RATIOS: Dict[str, Tuple[int, int]] = {
+    "9:16": (1080, 1920),
+    "4:5": (1080, 1350),
+    "1:1": (1080, 1080),
+}
+
+CALIBRATION_FILE = "./Cache/encoder.json"
+CALIBRATION_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow"]
+
+_calibration: Tuple[Optional[int], dict] = (None, {})  # (mtime, contents) of CALIBRATION_FILE
+
+
+def LoadCalibration() -> dict:
+    """
+    Returns the per-machine calibration results, or an empty dict if none were saved.
+
+    The file is parsed again only when its modification time changes. The returned dict is
+    shared and must not be modified.
+    """
+    global _calibration
+    try:
+        mtime = os.stat(CALIBRATION_FILE).st_mtime_ns
+        if _calibration[0] != mtime:
+            with open(CALIBRATION_FILE) as f:
+                _calibration = (mtime, json.load(f))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return _calibration[1]
+
+
+def _Profile(profile: str) -> dict:
+    """
+    Returns a copy of the uncalibrated settings of a named profile.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown render profile: {profile}. Choose from {', '.join(PROFILES)}.")
+    return dict(PROFILES[profile])
+
+
+def ProfileSettings(profile: str) -> dict:
+    """
+    Returns the settings of a named profile with this machine's calibrated preset applied.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    settings = _Profile(profile)
+    calibrated = LoadCalibration().get(profile)
+    if calibrated:
+        settings["preset"] = calibrated["preset"]
+    return settings
+
+
+def EncoderArgs(profile: str = DEFAULT_PROFILE, still: bool = False, audio: Optional[str] = None) -> List[str]:
+    """
+    Builds the ffmpeg output arguments for a render profile.
+
+    Parameters:
+        profile (str): Name of a profile in PROFILES.
+        still (bool): The video is a looped still image; adds -tune stillimage and uses still_fps.
+        audio (Optional[str]): Overrides the profile's audio handling ("copy" or "aac").
+
+    Returns:
+        List[str]: Video and audio codec arguments.
+    """
+    settings = ProfileSettings(profile)
+    fps = settings["still_fps"] if still else settings["fps"]
+    args = [
+        "-c:v", "libx264",
+        "-preset", settings["preset"],
+        "-crf", str(settings["crf"]),
+        "-r", str(fps),
+        "-g", str(settings["gop"]),
+        "-pix_fmt", "yuv420p",
+    ]
+    if still:
+        args += ["-tune", "stillimage"]
+
+    audio = audio or settings["audio"]
+    if audio == "copy":
+        args += ["-c:a", "copy"]
+    else:
+        args += ["-c:a", audio, "-b:a", settings.get("audio_bitrate", "192k")]
+
+    if settings["faststart"]:
+        args += ["-movflags", "+faststart"]
+    return args
+
+
+def StillFrameRate(profile: str = DEFAULT_PROFILE) -> int:
+    """Returns the input frame rate to loop a still image at for a profile."""
+    return ProfileSettings(profile)["still_fps"]
+
+
+def AspectSuffix(aspect: str) -> str:
+    """Returns a filename-safe tag for an aspect ratio, e.g. "9:16" -> "9x16"."""
+    return aspect.replace(":", "x")
+
+
+def AspectFilterGraph(outputs: List[str], input_label: str, prefilter: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    Builds an ffmpeg filter graph that processes the input once and fans it out to several canvases.
+
+    The input goes through `prefilter` (e.g. drawtext) once, is split, and each branch is
+    scaled to fit its canvas and padded to the exact size.
+
+    Parameters:
+        outputs (List[str]): Aspect ratios from ASPECT_RATIOS.
+        input_label (str): ffmpeg stream specifier of the video input, e.g. "0:v".
+        prefilter (Optional[str]): Filter chain applied before splitting.
+
+    Returns:
+        Tuple[str, List[str]]: The filter graph and the output labels to -map, in order.
+
+    Raises:
+        ValueError: If an aspect ratio is unknown.
+    """
+    unknown = [aspect for aspect in outputs if aspect not in ASPECT_RATIOS]
+    if unknown:
+        raise ValueError(f"Unknown output aspect ratio: {', '.join(unknown)}. Choose from {', '.join(ASPECT_RATIOS)}.")
+
+    head = f"[{input_label}]" + (f"{prefilter}," if prefilter else "")
+    branches = [f"[b{i}]" for i in range(len(outputs))]
+    chains = [f"{head}split={len(outputs)}{''.join(branches)}"]
+    labels = []
+    for i, aspect in enumerate(outputs):
+        width, height = ASPECT_RATIOS[aspect]
+        chains.append(
+            f"{branches[i]}scale={width}:{height}:force_original_aspect_ratio=decrease:force_divisible_by=2,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1[o{i}]"
+        )
+        labels.append(f"[o{i}]")
+    return ";".join(chains), labels
+
+
+def _MeasureSSIM(encoded: str, source: List[str]) -> float:
+    """Compares an encoded file against its lavfi source and returns the overall SSIM."""
+    result = subprocess.run(
+        ["ffmpeg", "-i", encoded, *source, "-lavfi", "[0:v][1:v]ssim", "-f", "null", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    match = re.search(r"All:([\d.]+)", result.stderr)
+    if not match:
+        raise ValueError("SSIM not found in ffmpeg output.")
+    return float(match.group(1))
+
+
+def CalibrateEncoder(
+    profile: str = DEFAULT_PROFILE,
+    target_ssim: Optional[float] = None,
+    max_kbps: Optional[float] = None,
+    seconds: int = 5,
+    size: str = "1080x1350",
+    presets: Optional[List[str]] = None,
+) -> dict:
+    """
+    Benchmarks x264 presets on this machine and stores the fastest one that meets the targets.
+
+    Each preset encodes a synthetic test pattern with the profile's CRF, fps and GOP. The
+    result is scored by SSIM against the source and by bitrate. At a fixed CRF every preset
+    reaches about the same quality and faster presets spend more bits instead, so by default
+    a preset may use at most the profile's size_budget more bitrate than the profile's own
+    preset. The fastest passing preset is saved to CALIBRATION_FILE, where ProfileSettings
+    picks it up.
+
+    Parameters:
+        profile (str): Profile to calibrate.
+        target_ssim (Optional[float]): Minimum SSIM a preset must reach, defaults to the profile's.
+        max_kbps (Optional[float]): Maximum video bitrate a preset may produce, defaults to the
+            bitrate of the profile's own preset plus its size_budget.
+        seconds (int): Length of the test clip.
+        size (str): Test clip resolution.
+        presets (Optional[List[str]]): Presets to try, defaults to CALIBRATION_PRESETS.
+
+    Returns:
+        dict: {"preset": chosen preset, "max_kbps": bitrate limit applied, "results": measurements
+            for every preset tried}.
+
+    Raises:
+        ValueError: If the profile does not exist or no preset meets the targets.
+    """
+    settings = _Profile(profile)
+    target_ssim = target_ssim or settings["target_ssim"]
+    source = ["-f", "lavfi", "-i", f"testsrc2=size={size}:rate={settings['fps']}:duration={seconds}"]
+    presets = list(presets or CALIBRATION_PRESETS)
+    if max_kbps is None and settings["preset"] not in presets:
+        presets.append(settings["preset"])  # Needed as the reference for the size budget
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for preset in presets:
+            encoded = os.path.join(workdir, f"{preset}.mp4")
+            command = [
+                "ffmpeg", *source,
+                "-c:v", "libx264", "-preset", preset, "-crf", str(settings["crf"]),
+                "-g", str(settings["gop"]), "-pix_fmt", "yuv420p",
+                "-y", "-loglevel", "error", encoded,
+            ]
+            start = time.perf_counter()
+            subprocess.run(command, check=True)
+            elapsed = time.perf_counter() - start
+
+            kbps = os.path.getsize(encoded) * 8 / 1000 / seconds
+            ssim = _MeasureSSIM(encoded, source)
+            results.append({"preset": preset, "seconds": elapsed, "kbps": kbps, "ssim": ssim})
+
+    if max_kbps is None:
+        reference = next(r for r in results if r["preset"] == settings["preset"])
+        max_kbps = reference["kbps"] * (1 + settings["size_budget"])
+    for r in results:
+        r["passed"] = r["ssim"] >= target_ssim and r["kbps"] <= max_kbps
+        logging.info(
+            f"{r['preset']}: {r['seconds']:.2f}s, {r['kbps']:.0f} kbps, SSIM {r['ssim']:.4f}"
+            f"{'' if r['passed'] else ' (rejected)'}"
+        )
+
+    passing = [r for r in results if r["passed"]]
+    if not passing:
+        raise ValueError(f"No preset met SSIM {target_ssim} and bitrate {max_kbps:.0f} kbps for {profile}.")
+    chosen = min(passing, key=lambda r: r["seconds"])["preset"]
+
+    calibration = dict(LoadCalibration())
+    calibration[profile] = {"preset": chosen, "target_ssim": target_ssim, "max_kbps": max_kbps, "results": results}
+    with WriteAtomic(CALIBRATION_FILE) as f:
+        json.dump(calibration, f, indent=2)
+    logging.info(f"Calibrated {profile} profile: preset {chosen} within {max_kbps:.0f} kbps")
+    return {"preset": chosen, "max_kbps": max_kbps, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate render profiles for this machine.")
+    parser.add_argument("profiles", nargs="*", default=list(PROFILES), help="Profiles to calibrate")
+    parser.add_argument("--target-ssim", type=float, default=None)
+    parser.add_argument("--max-kbps", type=float, default=None, help="Bitrate limit, defaults to the profile's preset plus its size_budget")
+    parser.add_argument("--seconds", type=int, default=5)
+    args = parser.parse_args()
+    for name in args.profiles:
+        CalibrateEncoder(name, args.target_ssim, args.max_kbps, args.seconds)
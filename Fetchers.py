@@ -0,0 +1,389 @@
+import abc
+import inspect
+import itertools
+import json
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+from urllib.parse import urlparse
+
+import requests
+
+logging.basicConfig(level=logging.INFO)
+
+PINTEREST_BASE_URL = "https://www.pinterest.com"
+PINTEREST_PAGE_SIZE = 25
+PINTEREST_IMAGE_SIZE = "736x"
+HTTP_TIMEOUT = (5, 30)  # (connect, read) seconds
+
+# Adaptive scrolling
+IDLE_SCROLLS = 3  # Consecutive scrolls without new images before giving up
+SCROLL_TIMEOUT = 5  # Seconds to wait for the page to grow after a scroll
+COLLECT_IMAGES_SCRIPT = "return Array.from(document.images, img => img.currentSrc || img.src);"
+
+# Browser pool
+DRIVER_POOL_SIZE = 2
+DRIVER_RECYCLE_PAGES = 20  # Pages a driver loads before it is replaced, bounding Chrome's memory growth
+
+
+class Fetcher(abc.ABC):
+    """
+    Source of image URLs for a board or profile page.
+
+    Adapters yield URLs lazily so downloads can start before the listing is complete.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def Matches(self, url: str) -> bool:
+        """Returns True if this adapter can list the given page."""
+
+    @abc.abstractmethod
+    def ImageURLs(self, url: str, max_pages: Optional[int] = None) -> Iterator[str]:
+        """
+        Yields full-size image URLs found on the page.
+
+        Parameters:
+            url (str): Board or profile URL.
+            max_pages (Optional[int]): Maximum pages (or scrolls) to read, None for no limit.
+        """
+
+    def Close(self) -> None:
+        """Releases connections, browsers or other resources held by the adapter."""
+
+
+class PinterestHTTPFetcher(Fetcher):
+    """
+    Lists Pinterest boards and profile pin pages through Pinterest's JSON resource endpoints.
+
+    Pages are fetched with plain HTTP and followed by bookmark, so no browser is started.
+    base_url can point at a local stand-in server serving recorded responses.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        base_url: str = PINTEREST_BASE_URL,
+        page_size: int = PINTEREST_PAGE_SIZE,
+        timeout=HTTP_TIMEOUT,
+    ):
+        if session is None:
+            from Scraper import CreateSession
+
+            session = CreateSession()
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.timeout = timeout
+
+    def Matches(self, url: str) -> bool:
+        host = urlparse(url).netloc.lower()
+        return "pinterest." in host or url.startswith(self.base_url)
+
+    def _Resource(self, resource: str, source_url: str, options: dict) -> dict:
+        """Calls one resource endpoint and returns its resource_response."""
+        response = self.session.get(
+            f"{self.base_url}/resource/{resource}/get/",
+            params={
+                "source_url": source_url,
+                "data": json.dumps({"options": options, "context": {}}),
+            },
+            headers={"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        result = payload.get("resource_response", {})
+        # Older responses carry the next bookmark in the echoed request options
+        if "bookmark" not in result:
+            bookmarks = payload.get("resource", {}).get("options", {}).get("bookmarks") or [None]
+            result["bookmark"] = bookmarks[0]
+        return result
+
+    def _Feed(self, path: str) -> tuple:
+        """
+        Maps a page path to the resource listing its pins and that resource's options.
+
+        /user/_created/ lists the pins the user created; /user/, /user/_saved/ and /user/pins/
+        list the pins they saved; /user/board/ lists a board.
+        """
+        parts = [part for part in path.strip("/").split("/") if part]
+        if not parts:
+            raise ValueError(f"Not a Pinterest board or profile URL: {path}")
+        username = parts[0]
+        if len(parts) > 1 and parts[1] == "_created":
+            return "UserActivityPinsResource", {"username": username, "page_size": self.page_size}
+        if len(parts) == 1 or parts[1] in ("_saved", "pins"):
+            return "UserPinsResource", {"username": username, "page_size": self.page_size}
+
+        board = self._Resource(
+            "BoardResource",
+            path,
+            {"username": username, "slug": parts[1], "field_set_key": "detailed"},
+        )
+        return "BoardFeedResource", {"board_id": board["data"]["id"], "page_size": self.page_size}
+
+    @staticmethod
+    def _ImageURL(pin: dict) -> Optional[str]:
+        images = pin.get("images") or {}
+        image = images.get(PINTEREST_IMAGE_SIZE) or images.get("orig")
+        return image.get("url") if image else None
+
+    def ImageURLs(self, url: str, max_pages: Optional[int] = None) -> Iterator[str]:
+        path = urlparse(url).path
+        resource, options = self._Feed(path)
+        bookmark = None
+        pages = itertools.count() if max_pages is None else range(max_pages)
+        for page in pages:
+            if bookmark:
+                options["bookmarks"] = [bookmark]
+            result = self._Resource(resource, path, options)
+            pins = result.get("data") or []
+            logging.info(f"Fetched page {page + 1} of {path}: {len(pins)} pins")
+            for pin in pins:
+                image_url = self._ImageURL(pin)
+                if image_url:
+                    yield image_url
+            bookmark = result.get("bookmark")
+            if not pins or not bookmark or bookmark == "-end-":
+                break
+
+    def Close(self) -> None:
+        self.session.close()
+
+
+def StartDriver(headless: bool = False):
+    """Starts a Chrome WebDriver."""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Chrome(options=options)
+
+
+class DriverPool:
+    """
+    Bounded pool of long-lived Chrome drivers shared between scraping threads.
+
+    Drivers are started on first use, up to size, and handed back to the pool after each
+    page so startup is paid once per driver rather than once per board. A driver is quit
+    and replaced after recycle_after pages.
+    """
+
+    def __init__(self, size: int = DRIVER_POOL_SIZE, headless: bool = True, recycle_after: int = DRIVER_RECYCLE_PAGES):
+        self.size = size
+        self.headless = headless
+        self.recycle_after = recycle_after
+        self._idle = queue.LifoQueue()  # Reuse the warmest driver first
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._pages: Dict[int, int] = {}  # id(driver) -> pages loaded
+        self._drivers = []
+        self._closed = False
+
+    @contextmanager
+    def Driver(self):
+        """Borrows a driver for one page, starting or recycling drivers as needed."""
+        self._slots.acquire()
+        driver = None
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = StartDriver(self.headless)
+                with self._lock:
+                    self._drivers.append(driver)
+                    self._pages[id(driver)] = 0
+                logging.info(f"Started browser {len(self._drivers)} of pool size {self.size}")
+            yield driver
+        except Exception:
+            # A driver that raised may be in an unknown state, so don't hand it out again
+            if driver is not None:
+                self._Discard(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                with self._lock:
+                    self._pages[id(driver)] += 1
+                    worn = self._pages[id(driver)] >= self.recycle_after
+                if worn or self._closed:
+                    self._Discard(driver)
+                else:
+                    self._idle.put(driver)
+            self._slots.release()
+
+    def _Discard(self, driver) -> None:
+        with self._lock:
+            self._pages.pop(id(driver), None)
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.error(f"Failed to quit browser: {e}")
+
+    def Close(self) -> None:
+        """Quits every idle driver; drivers still in use are quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._Discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class SeleniumFetcher(Fetcher):
+    """
+    Lists image URLs by scrolling the page in Chrome.
+
+    Works on any page that shows Pinterest-style 236x thumbnails, at the cost of a browser.
+    Drivers come from a DriverPool when one is given; otherwise one is started per listing.
+    """
+
+    name = "selenium"
+
+    def __init__(
+        self,
+        headless: bool = False,
+        idle_scrolls: int = IDLE_SCROLLS,
+        scroll_timeout: float = SCROLL_TIMEOUT,
+        pool: Optional[DriverPool] = None,
+    ):
+        self.headless = headless
+        self.idle_scrolls = idle_scrolls
+        self.scroll_timeout = scroll_timeout
+        self.pool = pool
+
+    def Matches(self, url: str) -> bool:
+        return url.startswith("http")
+
+    def ImageURLs(self, url: str, max_pages: Optional[int] = None) -> Iterator[str]:
+        if self.pool is not None:
+            with self.pool.Driver() as driver:
+                driver.get(url)
+                yield from ScrollForImages(driver, max_pages, self.idle_scrolls, self.scroll_timeout)
+            return
+
+        driver = StartDriver(self.headless)
+        try:
+            driver.get(url)
+            yield from ScrollForImages(driver, max_pages, self.idle_scrolls, self.scroll_timeout)
+        finally:
+            driver.quit()
+
+    def Close(self) -> None:
+        if self.pool is not None:
+            self.pool.Close()
+
+
+def ScrollForImages(driver, MAX: Optional[int], idle_scrolls: int, scroll_timeout: float) -> Iterator[str]:
+    """
+    Scrolls the page and yields new 736x image URLs after every scroll.
+
+    The grid is virtualized, so images are collected from the live DOM as they appear
+    rather than from the final page source. Scrolling stops after MAX scrolls or once
+    idle_scrolls consecutive scrolls add no new images. WebDriver errors end the scroll
+    so URLs already yielded are still downloaded.
+    """
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    seen = set()
+    idle = 0
+    scrolls = itertools.count() if MAX is None else range(MAX)
+    try:
+        for scroll in scrolls:
+            sources = driver.execute_script(COLLECT_IMAGES_SCRIPT)
+            new = [IMGSRC for IMGSRC in sources if IMGSRC and IMGSRC not in seen]
+            seen.update(new)
+            for IMGSRC in new:
+                if "236x" in IMGSRC:
+                    yield IMGSRC.replace("236x", "736x")
+
+            idle = 0 if new else idle + 1
+            if idle >= idle_scrolls:
+                logging.info(f"No new images after {idle} scrolls, stopping at scroll {scroll}")
+                break
+
+            height = driver.execute_script("return document.body.scrollHeight")
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            logging.info(f"SCROLLING PAGE ({len(seen)} images seen)")
+            try:
+                WebDriverWait(driver, scroll_timeout).until(
+                    lambda d: d.execute_script("return document.body.scrollHeight") > height
+                )
+            except TimeoutException:
+                pass
+    except WebDriverException as e:
+        logging.error(f"An error occurred while using the WebDriver: {e}")
+
+
+# Registered adapters, in the order the "auto" backend tries them
+FETCHERS: Dict[str, type] = {
+    PinterestHTTPFetcher.name: PinterestHTTPFetcher,
+    SeleniumFetcher.name: SeleniumFetcher,
+}
+BACKENDS = ("auto", *FETCHERS)
+
+
+def CreateFetchers(backend: str = "auto", **options) -> List[Fetcher]:
+    """
+    Instantiates the adapters a backend uses, in the order they are tried.
+
+    Each adapter receives the options its constructor accepts, so callers can pass the
+    settings of every adapter at once, e.g. session for HTTP and pool for Selenium.
+
+    Parameters:
+        backend (str): "auto" for every adapter in FETCHERS, or the name of one adapter.
+        options: Constructor arguments for the adapters.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown scraping backend: {backend}. Choose from {', '.join(BACKENDS)}.")
+    fetchers = []
+    for name in FETCHERS if backend == "auto" else [backend]:
+        fetcher_class = FETCHERS[name]
+        accepted = inspect.signature(fetcher_class).parameters
+        fetchers.append(fetcher_class(**{key: value for key, value in options.items() if key in accepted}))
+    return fetchers
+
+
+def ImageURLsWithFallback(fetchers: Sequence[Fetcher], url: str, max_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    Yields image URLs from the first adapter that produces any.
+
+    An adapter is skipped if it does not match the URL, and abandoned if it fails or ends
+    before producing a URL. The last adapter is always run, and its errors propagate.
+
+    Parameters:
+        fetchers (Sequence[Fetcher]): Adapters in order of preference, e.g. from CreateFetchers.
+        url (str): Board or profile URL.
+        max_pages (Optional[int]): Maximum pages (or scrolls) to read, None for no limit.
+    """
+    *preferred, last = fetchers
+    for fetcher in preferred:
+        if not fetcher.Matches(url):
+            continue
+        produced = False
+        try:
+            for image_url in fetcher.ImageURLs(url, max_pages):
+                produced = True
+                yield image_url
+        except Exception as e:
+            if produced:
+                raise
+            logging.warning(f"{fetcher.name} fetcher failed for {url}: {e}")
+        if produced:
+            return
+        logging.info(f"Falling back from the {fetcher.name} fetcher for {url}")
+    yield from last.ImageURLs(url, max_pages)
@@ -1,5 +1,11 @@
+import time
+
+STARTED = time.perf_counter()
+
+import functools
 import logging
 import re
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import os
@@ -7,6 +13,8 @@ from Video import TemplateVideo, PictureVideo
 from Scraper import ScrapeImages
 from Quote import GetQuote
 from General import DownloadVoice, GenerateTTS
+from Jobs import FAILED, FINISHED, AskParent, DescribeProgress, JobExecutor
+from Workspace import WriteAtomic
 import requests
 import sv_ttk
 import re
@@ -16,6 +24,8 @@ class MediaMate:
     FONT_PATH = "Roboto-Medium.ttf"
     ENTRY_WIDTH = 50
     PADDING = 5
+    JOB_LIST_ROWS = 50  # Finished jobs beyond this many are removed from a tab's list
+    RESULT_REQUIRED = ("template", "picture", "scrape")  # Tabs whose functions log errors and return None
     def __init__(self, root):
         WINDOW_SIZE = "700x600"
         BACKGROUND_COLOR = "#f0f0f0"
@@ -31,6 +41,11 @@ class MediaMate:
         style.configure("TLabel", background=BACKGROUND_COLOR)
         style.configure("TEntry", padding=5)
 
+        # Jobs run off the main thread; status changes are handed back to Tk with root.after
+        self.executor = JobExecutor(notify=lambda job: self.root.after(0, self.on_job_update, job))
+        self.job_lists = {}
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Create a notebook for tabbed interface
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(padx=10, pady=10, fill="both", expand=True)
@@ -89,11 +104,12 @@ class MediaMate:
 
         
         
-        # Ensure default font is available
-        try:
-            self.ensure_default_font()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to ensure default font: {e}")
+        # Ensure default font is available without blocking the window
+        threading.Thread(target=self.ensure_default_font, daemon=True).start()
+
+        # Optionally load OCR and TTS models in the background before they are needed
+        if os.environ.get("MEDIAMATE_WARM"):
+            threading.Thread(target=self.warm_dependencies, daemon=True).start()
 
 
 
@@ -119,6 +135,8 @@ class MediaMate:
         self.generate_button = self.create_button(self.video_frame, "Generate", self.generate_video, 2, 1)
         self.generate_button.state(["disabled"])
 
+        self.create_job_list(self.video_frame, "template", 3)
+
     def create_button(self, parent, text, command, row, column):
         button = ttk.Button(parent, text=text, command=command)
         button.grid(row=row, column=column, padx=self.PADDING, pady=self.PADDING)
@@ -154,28 +172,6 @@ class MediaMate:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to browse template file: {e}")
 
-    def generate_video(self):
-        quote = self.video_quote_entry.get() or self.default_quote_entry.get()
-        template_file = self.template_file_entry.get()
-        font_path = self.FONT_PATH
-
-        if not template_file:
-            messagebox.showerror("Error", "Please provide a template file.")
-            return
-
-        if not quote:
-            try:
-                TemplateVideo(GetQuote(), template_file, font_path)
-                messagebox.showinfo("Success", "Video generated successfully.")
-            except Exception as e:
-                self.handle_error("generate video", e)
-        else:
-            try:
-                TemplateVideo(quote, template_file, font_path)
-                messagebox.showinfo("Success", "Video generated successfully.")
-            except Exception as e:
-                self.handle_error("generate video", e)
-
     def create_picture_video_tab(self):
         ENTRY_WIDTH_LARGE = 50
         ENTRY_WIDTH_SMALL = 20
@@ -199,6 +195,8 @@ class MediaMate:
 
         self.create_button(self.picture_video_frame, "Generate Picture Video", self.generate_picture_video, 4, 1)
 
+        self.create_job_list(self.picture_video_frame, "picture", 5)
+
     def create_scraping_tab(self):
         self.create_label(self.scrape_frame, "URL:", 0, 0)
         self.url_entry = self.create_entry(self.scrape_frame, 50, 0, 1)
@@ -214,6 +212,8 @@ class MediaMate:
 
         self.create_button(self.scrape_frame, "Scrape Images", self.scrape_images, 3, 1)
 
+        self.create_job_list(self.scrape_frame, "scrape", 4)
+
     def create_config_tab(self):
         if not hasattr(self, 'config_tab_created'):
             ENTRY_WIDTH = 50  # Constant for entry width
@@ -247,6 +247,77 @@ class MediaMate:
         entry.grid(row=row, column=column, padx=5, pady=5)
         return entry
 
+    def create_job_list(self, parent, group, row):
+        """Adds a live list of the tab's jobs with their status, progress and elapsed time, and a cancel button."""
+        jobs = ttk.Treeview(parent, columns=("status", "progress", "elapsed"), height=5)
+        jobs.heading("#0", text="Job")
+        jobs.heading("status", text="Status")
+        jobs.heading("progress", text="Progress")
+        jobs.heading("elapsed", text="Elapsed")
+        jobs.column("#0", width=300)
+        jobs.column("status", width=90, anchor="center")
+        jobs.column("progress", width=130, anchor="center")
+        jobs.column("elapsed", width=70, anchor="e")
+        jobs.grid(row=row, column=0, columnspan=3, sticky="nsew", padx=self.PADDING, pady=self.PADDING)
+        ttk.Button(parent, text="Cancel", command=lambda: self.cancel_jobs(group)).grid(
+            row=row + 1, column=2, padx=self.PADDING, pady=self.PADDING
+        )
+        self.job_lists[group] = jobs
+        return jobs
+
+    def submit_job(self, group, name, function, *args, kind="thread", **kwargs):
+        """Runs function in the background and tracks it in the tab's job list."""
+        job = self.executor.Submit(
+            name, function, *args, kind=kind, group=group, require_result=group in self.RESULT_REQUIRED, **kwargs
+        )
+        self.refresh_jobs()
+        return job
+
+    def on_job_update(self, job):
+        """Shows a job's new status. Runs on the Tk main thread."""
+        jobs = self.job_lists.get(job.group)
+        if jobs is None:
+            return
+        progress = DescribeProgress(job.progress) if job.status not in FINISHED else ""
+        values = (job.status, progress, f"{job.elapsed:.0f}s")
+        if jobs.exists(job.id):
+            jobs.item(job.id, values=values)
+        else:
+            jobs.insert("", 0, iid=job.id, text=job.name, values=values)
+            for iid in jobs.get_children()[self.JOB_LIST_ROWS :]:
+                old = self.executor.jobs.get(int(iid))
+                if old is None or old.status in FINISHED:
+                    jobs.delete(iid)
+        if job.status == FAILED:
+            self.handle_error(f"run {job.name}", job.error)
+
+    def refresh_jobs(self):
+        """Updates elapsed times once a second while any job is queued or running."""
+        if getattr(self, "_refreshing", False):
+            return
+        active = self.executor.Active()
+        for job in active:
+            self.on_job_update(job)
+        if active:
+            self._refreshing = True
+            self.root.after(1000, self._refresh_tick)
+
+    def _refresh_tick(self):
+        self._refreshing = False
+        self.refresh_jobs()
+
+    def cancel_jobs(self, group):
+        """Cancels the selected jobs in a tab's list."""
+        jobs = self.job_lists[group]
+        for iid in jobs.selection():
+            job = self.executor.jobs.get(int(iid))
+            if job and job.status not in FINISHED:
+                self.executor.Cancel(job)
+
+    def on_close(self):
+        self.executor.Shutdown()
+        self.root.destroy()
+
     def browse_template_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Video Files", "*.mp4 *.mkv *.avi")])
         if file_path:
@@ -272,15 +343,30 @@ class MediaMate:
             self.default_font_entry.insert(0, file_path)
 
     def ensure_default_font(self):
+        """Downloads the default font if missing. Runs off the main thread."""
         if not os.path.isfile(self.FONT_PATH):
             try:
                 url = "https://github.com/openmaptiles/fonts/raw/refs/heads/master/roboto/Roboto-Medium.ttf"
-                response = requests.get(url)
-                with open(self.FONT_PATH, 'wb') as f:
+                response = requests.get(url, timeout=30)
+                response.raise_for_status()
+                with WriteAtomic(self.FONT_PATH, 'wb') as f:
                     f.write(response.content)
-                messagebox.showinfo("Info", "Default font downloaded successfully.")
+                self.root.after(0, lambda: messagebox.showinfo("Info", "Default font downloaded successfully."))
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to download default font: {e}")
+                self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to download default font: {e}"))
+
+    def warm_dependencies(self):
+        """Builds the OCR reader and loads the TTS model ahead of first use. Runs off the main thread."""
+        start = time.perf_counter()
+        try:
+            from Video import GetReader
+            from General import WarmTTS
+
+            GetReader()
+            WarmTTS()
+            logging.info(f"Warmed OCR and TTS in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logging.error(f"Failed to warm dependencies: {e}")
 
     def handle_error(self, action, e):
         messagebox.showerror("Error", f"Failed to {action}: {e}")
@@ -294,18 +380,11 @@ class MediaMate:
             messagebox.showerror("Error", "Please provide a template file.")
             return
 
+        name = f"Template: {os.path.basename(template_file)}"
         if not quote:
-            try:
-                TemplateVideo(GetQuote(), template_file, font_path)
-                messagebox.showinfo("Success", "Video generated successfully.")
-            except Exception as e:
-                self.handle_error("generate video", e)
+            self.submit_job("template", name, lambda: TemplateVideo(GetQuote(), template_file, font_path))
         else:
-            try:
-                TemplateVideo(quote, template_file, font_path)
-                messagebox.showinfo("Success", "Video generated successfully.")
-            except Exception as e:
-                self.handle_error("generate video", e)
+            self.submit_job("template", name, TemplateVideo, quote, template_file, font_path)
 
     def generate_picture_video(self):
         image_path = self.image_path_entry.get()
@@ -323,11 +402,17 @@ class MediaMate:
             messagebox.showerror("Error", "Music start and end times must be in HH:MM:SS or MM:SS format.")
             return
 
-        try:
-            PictureVideo(image_path, music_start, music_end, music_url, quote, font_path)
-            messagebox.showinfo("Success", "Picture video generated successfully.")
-        except Exception as e:
-            self.handle_error("generate picture video", e)
+        # OCR and the quote overlay are CPU work in Python, so renders get their own process.
+        # An image without text asks this process's prefetch queue for a quote.
+        self.submit_job(
+            "picture",
+            f"Picture: {os.path.basename(image_path)}",
+            PictureVideo,
+            image_path, music_start, music_end, music_url, quote or None, font_path,
+            quote_source=functools.partial(AskParent, "quote"),
+            kind="process",
+            providers={"quote": GetQuote},
+        )
 
     def scrape_images(self):
         url = self.url_entry.get()
@@ -349,13 +434,7 @@ class MediaMate:
             messagebox.showerror("Error", "Scroll times must be a valid integer.")
             return
 
-        try:
-            ScrapeImages(url, folder, scroll_times_int)
-            messagebox.showinfo("Success", "Images scraped successfully.")
-            logging.info("Image scraping process completed successfully.")
-        except Exception as e:
-            self.handle_error("scrape images", e)
-            logging.error(f"Image scraping process failed: {e}")
+        self.submit_job("scrape", f"Scrape: {url}", ScrapeImages, url, folder, scroll_times_int)
 
 
     def create_download_voice_tab(self):
@@ -378,6 +457,8 @@ class MediaMate:
         self.download_button.config(state="disabled")
         self.download_button.grid(row=2, column=0, columnspan=2, padx=self.PADDING, pady=self.PADDING)
 
+        self.create_job_list(download_voice_tab, "voice", 3)
+
     def check_input_fields(self):
         url = self.url_entry.get()
         name = self.name_entry.get()
@@ -408,11 +489,7 @@ class MediaMate:
             messagebox.showwarning("Invalid URL", "Please enter a valid YouTube URL.")
             return False
 
-        try:
-            DownloadVoice(url, name)
-            messagebox.showinfo("Success", "Voice downloaded successfully.")
-        except Exception as e:
-            self.handle_error("download voice", e)
+        self.submit_job("voice", f"Voice: {name}", DownloadVoice, url, name)
 
 
     def create_tts_tab(self):
@@ -443,6 +520,8 @@ class MediaMate:
         generate_button = ttk.Button(tts_tab, text="Generate TTS", command=self.generate_tts)
         generate_button.grid(row=3, column=0, columnspan=2, padx=self.PADDING, pady=self.PADDING)
 
+        self.create_job_list(tts_tab, "tts", 4)
+
     def browse_speaker_file(self):
         filename = filedialog.askopenfilename(title="Select Speaker WAV file", filetypes=[("WAV files", "*.wav")])
         if filename:
@@ -453,12 +532,13 @@ class MediaMate:
         text = self.text_entry.get()
         speaker_file = self.speaker_entry.get()
         filename = self.filename_entry.get()
-        GenerateTTS(text, speaker_file, filename)
-        messagebox.showinfo("Success", "TTS generated successfully.")
+        # TTS stays in this process so the loaded model is reused between jobs
+        self.submit_job("tts", f"TTS: {filename or text[:30]}", GenerateTTS, text, speaker_file, filename)
 
 # Example usage
 if __name__ == "__main__":
     root = tk.Tk()
     app = MediaMate(root)
     sv_ttk.set_theme("dark")
+    root.after_idle(lambda: logging.info(f"MediaMate started in {time.perf_counter() - STARTED:.2f}s"))
     root.mainloop()
\ No newline at end of file
@@ -1,33 +1,466 @@
 import logging
 import subprocess
-from bs4 import BeautifulSoup
 import random
-import requests
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
 import os
-from TTS.api import TTS
-import torch
 import tempfile
 import shutil
+import hashlib
+import importlib.metadata
+import threading
+import time
+import wave
+from collections import OrderedDict
+from contextlib import contextmanager
+import psutil
+from Timing import Timed
+from Workspace import WriteAtomic
 
+XTTS_MODEL = "tts_models/multilingual/multi-dataset/xtts_v2"
 
+# Loaded models stay warm for the life of the process, keyed by (model, device).
+MODEL_CACHE_SIZE = 1  # Maximum number of models kept loaded at once
+MODEL_IDLE_TIMEOUT = 15 * 60  # Seconds a model may sit unused before it is unloaded
+MIN_FREE_MEMORY = 2 * 1024**3  # Bytes of free RAM/VRAM to keep before loading another model
 
+VOICES_DIR = "./Voices"
+LATENTS_SUFFIX = ".latents.pt"
+LATENTS_MEMO_SIZE = 32  # Speaker latents kept in memory, least recently used dropped first
+
+# Streaming output is mono signed 16-bit PCM at the XTTS output rate.
+TTS_SAMPLE_RATE = 24000
+# ffmpeg input arguments for consuming a TTS stream written to its stdin.
+PCM_FFMPEG_INPUT = ["-f", "s16le", "-ar", str(TTS_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0"]
+
+_models: "OrderedDict[tuple, dict]" = OrderedDict()
+_models_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+
+
+def DefaultDevice() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _MemoryTight(device: str) -> bool:
+    """Returns True if the target device has less than MIN_FREE_MEMORY available."""
+    import torch
+
+    try:
+        if device.startswith("cuda"):
+            free, _ = torch.cuda.mem_get_info()
+        else:
+            free = psutil.virtual_memory().available
+        return free < MIN_FREE_MEMORY
+    except Exception:
+        return False
+
+
+def _IdleModels() -> List[tuple]:
+    """Returns the keys of loaded models nobody is using, least recently used first. Caller holds _models_lock."""
+    return [key for key, entry in _models.items() if entry["users"] == 0]
+
+
+def _UnloadModel(key: tuple) -> None:
+    """Drops a model from the registry and releases cached GPU memory. Caller holds _models_lock."""
+    entry = _models.pop(key, None)
+    if entry is None:
+        return
+    logging.info(f"Unloading TTS model: {key[0]} ({key[1]})")
+    del entry
+    if key[1].startswith("cuda"):
+        import torch
+
+        torch.cuda.empty_cache()
+
+
+def EvictIdleModels(timeout: float = None) -> None:
+    """
+    Unloads every model that is not in use and has not been used for `timeout` seconds.
+
+    Parameters:
+        timeout (float): Idle time in seconds, defaults to MODEL_IDLE_TIMEOUT.
+    """
+    timeout = MODEL_IDLE_TIMEOUT if timeout is None else timeout
+    now = time.monotonic()
+    with _models_lock:
+        for key in _IdleModels():
+            if now - _models[key]["last_used"] >= timeout:
+                _UnloadModel(key)
+
+
+def UnloadTTSModels() -> None:
+    """Unloads all cached TTS models that are not in use."""
+    with _models_lock:
+        for key in _IdleModels():
+            _UnloadModel(key)
+
+
+def _SweepIdleModels() -> None:
+    while True:
+        time.sleep(max(MODEL_IDLE_TIMEOUT / 4, 1))
+        EvictIdleModels()
+
+
+@Timed("GetTTSModel")
+def _AcquireModel(model_name: str, device: Optional[str]) -> dict:
+    """
+    Returns the loaded registry entry for a model and counts the caller as one of its users.
+
+    The entry is registered before loading starts, so concurrent callers for the same model
+    wait on its "ready" event instead of loading it again, and _models_lock is only held for
+    bookkeeping, never while a model loads. Every call must be paired with _ReleaseModel.
+    """
+    global _sweeper
+    device = device or DefaultDevice()
+    key = (model_name, device)
+    with _models_lock:
+        entry = _models.get(key)
+        loading = entry is None
+        if loading:
+            while _models and (len(_models) >= MODEL_CACHE_SIZE or _MemoryTight(device)):
+                idle = _IdleModels()
+                if not idle:
+                    logging.warning(f"All loaded TTS models are in use, loading {model_name} alongside them")
+                    break
+                _UnloadModel(idle[0])
+            entry = {"model": None, "lock": threading.Lock(), "ready": threading.Event(), "error": None, "users": 0}
+            _models[key] = entry
+        entry["users"] += 1
+        entry["last_used"] = time.monotonic()
+        _models.move_to_end(key)
+
+    if not loading:
+        entry["ready"].wait()
+        if entry["error"] is not None:
+            _ReleaseModel(entry)
+            raise RuntimeError(f"Loading TTS model {model_name} failed: {entry['error']}")
+        return entry
+
+    try:
+        from TTS.api import TTS
+
+        start = time.perf_counter()
+        entry["model"] = TTS(model_name).to(device)
+        logging.info(f"Loaded TTS model {model_name} on {device} in {time.perf_counter() - start:.1f}s")
+    except BaseException as e:
+        entry["error"] = e
+        with _models_lock:
+            if _models.get(key) is entry:
+                del _models[key]
+            entry["users"] -= 1
+        raise
+    finally:
+        entry["ready"].set()
+
+    with _models_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_SweepIdleModels, daemon=True)
+            _sweeper.start()
+    return entry
+
+
+def _ReleaseModel(entry: dict) -> None:
+    """Ends one use of a registry entry taken with _AcquireModel."""
+    with _models_lock:
+        entry["users"] -= 1
+        entry["last_used"] = time.monotonic()
+
+
+def GetTTSModel(model_name: str = XTTS_MODEL, device: Optional[str] = None) -> dict:
+    """
+    Returns the registry entry for a TTS model, loading it only if it is not already warm.
+
+    The least recently used model that is not in use is unloaded when the registry is over
+    MODEL_CACHE_SIZE or the device is short on memory. Idle models are unloaded by a
+    background sweeper, so hold the model with UseTTSModel while running it.
+
+    Parameters:
+        model_name (str): Coqui TTS model name.
+        device (Optional[str]): Torch device, defaults to CUDA when available.
+
+    Returns:
+        dict: {"model": TTS, "lock": threading.Lock, "last_used": float, "users": int, ...}
+    """
+    entry = _AcquireModel(model_name, device)
+    _ReleaseModel(entry)
+    return entry
+
+
+@contextmanager
+def UseTTSModel(model_name: str = XTTS_MODEL, device: Optional[str] = None):
+    """
+    Context manager yielding a warm TTS model with exclusive use for the duration of the block.
+
+    The model counts as in use from the moment the block is entered, so neither eviction nor
+    the idle sweeper unloads it while the block waits for or holds the model lock.
+
+    Parameters:
+        model_name (str): Coqui TTS model name.
+        device (Optional[str]): Torch device, defaults to CUDA when available.
+    """
+    entry = _AcquireModel(model_name, device)
+    try:
+        with entry["lock"]:
+            yield entry["model"]
+    finally:
+        _ReleaseModel(entry)
+
+
+# (path, mtime, size, model version) -> (gpt_cond_latent, speaker_embedding) on CPU
+_latents_memo: "OrderedDict[tuple, tuple]" = OrderedDict()
+_latents_memo_lock = threading.Lock()
+
+
+def ResolveSpeaker(speaker: str) -> str:
+    """Returns the path of a speaker WAV, accepting either a path or a voice name from ./Voices."""
+    if os.path.isfile(speaker):
+        return speaker
+    voice = os.path.join(VOICES_DIR, f"{speaker.replace(' ', '')}.wav")
+    if os.path.isfile(voice):
+        return voice
+    raise FileNotFoundError(f"Speaker WAV not found: {speaker}")
+
+
+def ModelVersion(model_name: str = XTTS_MODEL) -> str:
+    """Identifies the model and library build that conditioning latents were computed with."""
+    try:
+        return f"{model_name}@{importlib.metadata.version('coqui-tts')}"
+    except importlib.metadata.PackageNotFoundError:
+        return model_name
+
+
+def HashFile(path: str) -> str:
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@Timed()
+def GetSpeakerLatents(tts, speaker_wav: str, model_name: str = XTTS_MODEL) -> tuple:
+    """
+    Returns the XTTS conditioning latents for a speaker, computing them at most once per voice.
+
+    Latents are persisted next to the voice as `<voice>.latents.pt`, tagged with the WAV's
+    content hash and the model version. A cached entry is only used when both still match,
+    so replacing the WAV or upgrading the model recomputes them.
+
+    Parameters:
+        tts (TTS): A loaded XTTS model.
+        speaker_wav (str): Path to the reference WAV.
+        model_name (str): Coqui TTS model name the latents belong to.
+
+    Returns:
+        tuple: (gpt_cond_latent, speaker_embedding) on the model's device.
+    """
+    import torch
+
+    stat = os.stat(speaker_wav)
+    version = ModelVersion(model_name)
+    memo_key = (os.path.abspath(speaker_wav), stat.st_mtime_ns, stat.st_size, version)
+    device = tts.synthesizer.tts_model.device
+
+    with _latents_memo_lock:
+        latents = _latents_memo.get(memo_key)
+        if latents is not None:
+            _latents_memo.move_to_end(memo_key)
+    if latents is None:
+        cache_path = os.path.splitext(speaker_wav)[0] + LATENTS_SUFFIX
+        content_hash = HashFile(speaker_wav)
+        try:
+            cached = torch.load(cache_path, map_location="cpu", weights_only=True)
+            if cached.get("sha256") == content_hash and cached.get("model") == version:
+                latents = (cached["gpt_cond_latent"], cached["speaker_embedding"])
+                logging.info(f"Loaded cached speaker latents: {cache_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable speaker latents {cache_path}: {e}")
+
+        if latents is None:
+            gpt_cond_latent, speaker_embedding = tts.synthesizer.tts_model.get_conditioning_latents(
+                audio_path=[speaker_wav]
+            )
+            latents = (gpt_cond_latent.cpu(), speaker_embedding.cpu())
+            with WriteAtomic(cache_path, "wb") as f:
+                torch.save(
+                    {
+                        "sha256": content_hash,
+                        "model": version,
+                        "gpt_cond_latent": latents[0],
+                        "speaker_embedding": latents[1],
+                    },
+                    f,
+                )
+            logging.info(f"Saved speaker latents: {cache_path}")
+        with _latents_memo_lock:
+            _latents_memo[memo_key] = latents
+            while len(_latents_memo) > LATENTS_MEMO_SIZE:
+                _latents_memo.popitem(last=False)
+
+    return latents[0].to(device), latents[1].to(device)
+
+
+@Timed("synthesize")
+def _Synthesize(tts, text: str, latents: tuple, filename: str) -> None:
+    gpt_cond_latent, speaker_embedding = latents
+    out = tts.synthesizer.tts_model.inference(
+        text,
+        "en",
+        gpt_cond_latent,
+        speaker_embedding,
+        enable_text_splitting=True,
+    )
+    tts.synthesizer.save_wav(wav=out["wav"], path=filename)
+
+
+def WarmTTS() -> None:
+    """Loads the default TTS model into the registry ahead of the first request."""
+    GetTTSModel()
+
+
+@Timed()
 def GenerateTTS(text: str, speaker: str, filename: str):
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    speaker_wav = ResolveSpeaker(speaker)
+    with UseTTSModel() as tts:
+        _Synthesize(tts, text, GetSpeakerLatents(tts, speaker_wav), filename)
+
+
+def StreamTTS(text: str, speaker: str, chunk_size: int = 20) -> Iterator[bytes]:
+    """
+    Synthesizes text and yields audio as XTTS produces it instead of after the whole passage.
+
+    Chunks are mono signed 16-bit little-endian PCM at TTS_SAMPLE_RATE. The model stays
+    locked to this stream until the generator is exhausted or closed.
+
+    Parameters:
+        text (str): Text to voice.
+        speaker (str): Speaker WAV path or voice name from ./Voices.
+        chunk_size (int): XTTS stream chunk size in GPT tokens; smaller starts sooner.
+
+    Yields:
+        bytes: PCM audio chunks.
+    """
+    import torch
+
+    speaker_wav = ResolveSpeaker(speaker)
+    with UseTTSModel() as tts:
+        gpt_cond_latent, speaker_embedding = GetSpeakerLatents(tts, speaker_wav)
+        start = time.perf_counter()
+        first = True
+        for chunk in tts.synthesizer.tts_model.inference_stream(
+            text,
+            "en",
+            gpt_cond_latent,
+            speaker_embedding,
+            stream_chunk_size=chunk_size,
+            enable_text_splitting=True,
+        ):
+            if first:
+                logging.info(f"First TTS audio after {time.perf_counter() - start:.2f}s")
+                first = False
+            pcm = (chunk.squeeze().clamp(-1, 1) * 32767).to(torch.int16)
+            yield pcm.cpu().numpy().tobytes()
+
+
+def WriteTTSStream(chunks: Iterator[bytes], sink: Union[str, BinaryIO]) -> float:
+    """
+    Writes PCM chunks from StreamTTS to a sink as they arrive.
+
+    A string sink is treated as a WAV path and written progressively. Any other sink must
+    have a write() method and receives raw PCM, e.g. the stdin of an ffmpeg process started
+    with PCM_FFMPEG_INPUT.
 
-    tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(device)
+    Parameters:
+        chunks (Iterator[bytes]): PCM chunks, usually from StreamTTS.
+        sink (Union[str, BinaryIO]): WAV path or writable binary stream.
 
-    tts.tts_to_file(
-    text=text,
-    speaker_wav=f"{speaker}",
-    language="en",
-    file_path=filename
+    Returns:
+        float: Seconds of audio written.
+    """
+    frames = 0
+    if isinstance(sink, str):
+        with wave.open(sink, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(TTS_SAMPLE_RATE)
+            for chunk in chunks:
+                wav.writeframes(chunk)
+                frames += len(chunk) // 2
+    else:
+        for chunk in chunks:
+            sink.write(chunk)
+            sink.flush()
+            frames += len(chunk) // 2
+    return frames / TTS_SAMPLE_RATE
+
+
+def GenerateTTSBatch(texts: List[str], speaker: str, out_dir: str) -> List[dict]:
+    """
+    Synthesizes many texts with one model session and one set of speaker latents.
+
+    Each text is written to `out_dir/NNNN.wav` in input order. A failing item is logged
+    and reported without stopping the rest of the batch.
+
+    Parameters:
+        texts (List[str]): Texts to voice, e.g. quotes from Quote.GetQuote.
+        speaker (str): Speaker WAV path or voice name from ./Voices.
+        out_dir (str): Directory the audio files are written to.
+
+    Returns:
+        List[dict]: One entry per text with "text", "path", "seconds" and "error".
+    """
+    speaker_wav = ResolveSpeaker(speaker)
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+
+    batch_start = time.perf_counter()
+    with UseTTSModel() as tts:
+        latents = GetSpeakerLatents(tts, speaker_wav)
+        setup_seconds = time.perf_counter() - batch_start
+        logging.info(f"TTS batch setup took {setup_seconds:.2f}s")
+
+        for i, text in enumerate(texts):
+            filename = os.path.join(out_dir, f"{i:04d}.wav")
+            start = time.perf_counter()
+            error = None
+            try:
+                _Synthesize(tts, text, latents, filename)
+            except Exception as e:
+                error = str(e)
+                logging.error(f"Failed to synthesize item {i}: {e}")
+            seconds = time.perf_counter() - start
+            results.append({"text": text, "path": filename, "seconds": seconds, "error": error})
+            logging.info(f"[{i + 1}/{len(texts)}] {filename} in {seconds:.2f}s")
+
+    logging.info(
+        f"TTS batch finished: {len(texts)} items in {time.perf_counter() - batch_start:.2f}s "
+        f"(setup {setup_seconds:.2f}s)"
     )
+    return results
+
+
+def DownloadVoice(URL: str, Name: str) -> str:
+    """
+    Downloads the audio of a video as a voice sample in ./Voices.
+
+    Parameters:
+        URL (str): URL of the video.
+        Name (str): Voice name; spaces are removed for the file name.
 
+    Returns:
+        str: Path of the saved WAV file.
 
-def DownloadVoice(URL: str, Name: str) -> None:
+    Raises:
+        subprocess.CalledProcessError: If yt-dlp fails.
+        OSError: If the sample cannot be saved.
+    """
+    temp_dir = tempfile.mkdtemp()
     try:
-        temp_dir = tempfile.mkdtemp()
         temp_file = os.path.join(temp_dir, f"{Name}.wav")
 
         options = [
@@ -44,16 +477,21 @@ def DownloadVoice(URL: str, Name: str) -> None:
 
         subprocess.run(options, check=True)
 
-        shutil.move(temp_file, f"./Voices/{Name.replace(' ', '')}.wav")
+        os.makedirs(VOICES_DIR, exist_ok=True)
+        destination = os.path.join(VOICES_DIR, f"{Name.replace(' ', '')}.wav")
+        shutil.move(temp_file, destination)
 
         logging.info(f"Successfully downloaded: {URL}")
+        return destination
 
     except subprocess.CalledProcessError as e:
         logging.error(f"An error occurred while downloading {URL}: {e}")
+        raise
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}")
+        raise
     finally:
-        shutil.rmtree(temp_dir)
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 #https://www.youtube.com/watch?v=b4lDJe9Nv4k
 
@@ -74,4 +512,4 @@ def DownloadVoice(URL: str, Name: str) -> None:
 #     "./TTS/Pedestrian.mp3",
 # )
 #AudibleQuote()
-#scrapeWikiquote("albert einstein")
\ No newline at end of file
+# QuoteStore().Add(ScrapeWikiquote("albert einstein"), source="wikiquote")  # see QuoteStore.py
\ No newline at end of file
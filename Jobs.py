@@ -0,0 +1,376 @@
+import functools
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from Timing import ProgressHandler
+
+logging.basicConfig(level=logging.INFO)
+
+JOB_THREADS = 4  # Scraping, downloads and TTS: I/O bound or release the GIL
+JOB_PROCESSES = 2  # Renders: OCR, Pillow overlays and ffmpeg, isolated from the caller
+JOB_HISTORY = 200  # Finished jobs kept in JobExecutor.jobs; older ones are dropped
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    """One unit of work submitted to a JobExecutor, with its status and timing."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, kind: str, group: Optional[str] = None):
+        self.id = next(self._ids)
+        self.name = name
+        self.kind = kind
+        self.group = group
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.future: Optional[Future] = None
+        self.progress: Optional[dict] = None  # Latest Timing.ReportProgress event
+        self.providers: Dict[str, Callable[[], Any]] = {}  # Values the job can ask for with AskParent
+        self._done = threading.Event()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds the job has been running, or ran for once finished."""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def Wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the job's outcome has been recorded. Returns False if timeout expires first."""
+        return self._done.wait(timeout)
+
+    def __repr__(self) -> str:
+        return f"Job({self.id}, {self.name!r}, {self.status})"
+
+
+def DescribeProgress(progress: Optional[dict]) -> str:
+    """Formats a progress event for display, e.g. "42% 30 fps 1.8x" or "12/40"."""
+    if not progress:
+        return ""
+    parts = []
+    if "fraction" in progress:
+        parts.append(f"{progress['fraction']:.0%}")
+    elif "done" in progress:
+        parts.append(f"{progress['done']}/{progress['total']}")
+    if progress.get("fps"):
+        parts.append(f"{progress['fps']:.0f} fps")
+    if progress.get("speed"):
+        parts.append(f"{progress['speed']:.1f}x")
+    return " ".join(parts)
+
+
+class _ErrorRecorder(logging.Handler):
+    """Remembers the last error logged on the thread that created it."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.message: Optional[str] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.thread == self.thread:
+            self.message = record.getMessage()
+
+
+def _RequireResult(function: Callable, *args, **kwargs):
+    """Calls function and raises if it returns None, giving the last error it logged as the reason."""
+    recorder = _ErrorRecorder()
+    logging.getLogger().addHandler(recorder)
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        logging.getLogger().removeHandler(recorder)
+    if result is None:
+        raise RuntimeError(recorder.message or f"{getattr(function, '__name__', 'Job')} returned no result")
+    return result
+
+
+_progress_queue = None  # Worker -> parent: ("progress", job_id, event) and ("request", job_id, (slot, name))
+_reply_queues = None  # Parent -> worker: one per running job slot, carrying (job_id, ok, value)
+_current = threading.local()  # What AskParent needs to reach the running job's providers
+
+
+def _InitWorker(progress_queue, reply_queues) -> None:
+    global _progress_queue, _reply_queues
+    _progress_queue = progress_queue
+    _reply_queues = reply_queues
+
+
+def _RunInWorker(job_id: int, slot: int, function: Callable, args: tuple, kwargs: dict):
+    """Runs a process job, forwarding its progress reports and provider requests to the parent."""
+    _current.job = (job_id, slot)
+    try:
+        with ProgressHandler(lambda event: _progress_queue.put(("progress", job_id, event))):
+            return function(*args, **kwargs)
+    finally:
+        _current.job = None
+
+
+def AskParent(name: str) -> Any:
+    """
+    Returns a value from one of the providers the running job was submitted with.
+
+    Providers run in the submitting process, so a process job can use state that lives there,
+    such as the quote prefetch queue, and only pays for it when it actually needs the value.
+    Pass functools.partial(AskParent, name) to a job as a lazy source.
+
+    Raises:
+        RuntimeError: If called outside a job, or the provider is missing or failed.
+    """
+    providers = getattr(_current, "providers", None)
+    if providers is not None:
+        if name not in providers:
+            raise RuntimeError(f"Job has no provider for {name}")
+        return providers[name]()
+    job = getattr(_current, "job", None)
+    if job is None:
+        raise RuntimeError(f"AskParent({name!r}) called outside a job")
+    job_id, slot = job
+    _progress_queue.put(("request", job_id, (slot, name)))
+    while True:
+        reply_id, ok, value = _reply_queues[slot].get()
+        if reply_id == job_id:  # Anything else was left behind by a job that crashed mid-request
+            break
+    if not ok:
+        raise RuntimeError(value)
+    return value
+
+
+class JobExecutor:
+    """
+    Runs jobs on a thread pool or a process pool and reports every status change.
+
+    notify is called with the Job from a worker thread whenever its status changes; a GUI
+    should hand it to its own event loop (e.g. with root.after) before touching widgets.
+    Process jobs must be picklable top-level functions and run in spawned workers, so a
+    crashing render never takes the caller down with it.
+    """
+
+    def __init__(
+        self,
+        threads: int = JOB_THREADS,
+        processes: int = JOB_PROCESSES,
+        notify: Optional[Callable[[Job], None]] = None,
+    ):
+        self.notify = notify
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job")
+        # One dispatcher thread per worker process waits on that process's current job,
+        # so a process job is queued here until a process is free to start it
+        self._dispatchers = ThreadPoolExecutor(max_workers=processes, thread_name_prefix="job-process")
+        self._process_count = processes
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._reply_queues = None
+        self._slots: "queue.Queue[int]" = queue.Queue()  # Reply queue indexes free for a starting process job
+        self._progress_reader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._jobs_lock = threading.Lock()
+        self.jobs: Dict[int, Job] = {}
+
+    def _Notify(self, job: Job) -> None:
+        if self.notify is not None:
+            try:
+                self.notify(job)
+            except Exception as e:
+                logging.error(f"Job notification failed for {job}: {e}")
+
+    def _ProcessPool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                # Spawn rather than fork: the parent may hold Tk, torch or driver threads
+                context = multiprocessing.get_context("spawn")
+                self._progress_queue = context.Queue()
+                # At most one process job per dispatcher runs at once, so each holds its own reply queue
+                self._reply_queues = [context.Queue() for _ in range(self._process_count)]
+                for slot in range(self._process_count):
+                    self._slots.put(slot)
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self._process_count,
+                    mp_context=context,
+                    initializer=_InitWorker,
+                    initargs=(self._progress_queue, self._reply_queues),
+                )
+                self._progress_reader = threading.Thread(target=self._ReadProgress, name="job-progress", daemon=True)
+                self._progress_reader.start()
+            return self._processes
+
+    def Submit(
+        self,
+        name: str,
+        function: Callable,
+        *args,
+        kind: str = "thread",
+        group: Optional[str] = None,
+        providers: Optional[Dict[str, Callable[[], Any]]] = None,
+        require_result: bool = False,
+        **kwargs,
+    ) -> Job:
+        """
+        Queues function(*args, **kwargs) as a job.
+
+        Parameters:
+            name (str): Label shown in job lists and logs.
+            function (Callable): Work to run. Must be a picklable top-level function for kind="process".
+            kind (str): "thread" or "process".
+            group (Optional[str]): Free-form tag, e.g. the GUI tab that started the job.
+            providers (Optional[Dict[str, Callable[[], Any]]]): Values the job may ask this process
+                for with AskParent(name), computed here only when asked. Use them for state a
+                worker process cannot share, such as the quote prefetch queue.
+            require_result (bool): Fail the job when function returns None, for functions that log
+                their errors and return None instead of raising. The last error they logged
+                becomes the job's error.
+
+        Returns:
+            Job: The queued job.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown job kind: {kind}. Choose from thread, process.")
+        job = Job(name, kind, group)
+        job.providers = dict(providers or {})
+        with self._jobs_lock:
+            self.jobs[job.id] = job
+        if require_result:
+            function = functools.partial(_RequireResult, function)
+
+        def Run():
+            if job.status == CANCELLED:
+                return None
+            job.started = time.time()
+            job.status = RUNNING
+            self._Notify(job)
+            if kind == "process":
+                pool = self._ProcessPool()
+                slot = self._slots.get()
+                try:
+                    return pool.submit(_RunInWorker, job.id, slot, function, args, kwargs).result()
+                finally:
+                    self._slots.put(slot)
+            _current.providers = job.providers
+            try:
+                with ProgressHandler(lambda event: self._Progress(job, event)):
+                    return function(*args, **kwargs)
+            finally:
+                _current.providers = None
+
+        pool = self._threads if kind == "thread" else self._dispatchers
+        job.future = pool.submit(Run)
+        job.future.add_done_callback(lambda future: self._Finish(job, future))
+        self._Notify(job)
+        return job
+
+    def _Progress(self, job: Job, event: dict) -> None:
+        if job.status == RUNNING:
+            job.progress = event
+            self._Notify(job)
+
+    def _ReadProgress(self) -> None:
+        """Hands progress reports and provider requests from worker processes to their jobs until shutdown."""
+        while True:
+            try:
+                item = self._progress_queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            message, job_id, payload = item
+            job = self.jobs.get(job_id)
+            if message == "request":
+                # Providers may block, e.g. on the quote API, so they don't hold up progress reports
+                threading.Thread(target=self._Answer, args=(job, job_id, *payload), daemon=True).start()
+            elif job is not None:
+                self._Progress(job, payload)
+
+    def _Answer(self, job: Optional[Job], job_id: int, slot: int, name: str) -> None:
+        """Runs a provider for a process job and sends the value, or the error, back to its worker."""
+        try:
+            if job is None or name not in job.providers:
+                raise KeyError(f"Job has no provider for {name}")
+            reply = (job_id, True, job.providers[name]())
+        except Exception as e:
+            logging.error(f"Provider {name} failed for job {job_id}: {e}")
+            reply = (job_id, False, f"{name} unavailable: {e}")
+        self._reply_queues[slot].put(reply)
+
+    def _Finish(self, job: Job, future: Future) -> None:
+        job.finished = job.finished or time.time()
+        if job.status == CANCELLED:
+            pass
+        elif future.cancelled():
+            job.status = CANCELLED
+        else:
+            try:
+                job.result = future.result()
+                job.status = DONE
+            except CancelledError:
+                job.status = CANCELLED
+            except BaseException as e:
+                job.error = e
+                job.status = FAILED
+                logging.error(f"Job {job.name} failed: {e}")
+        job.started = job.started or job.finished
+        logging.info(f"Job {job.name} {job.status} after {job.elapsed:.1f}s")
+        job._done.set()
+        self._Notify(job)
+        self._Prune()
+
+    def _Prune(self) -> None:
+        """Drops the oldest finished jobs beyond JOB_HISTORY."""
+        with self._jobs_lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]
+            for job_id in finished[: max(len(finished) - JOB_HISTORY, 0)]:
+                del self.jobs[job_id]
+
+    def Cancel(self, job: Job) -> bool:
+        """
+        Cancels a job.
+
+        Queued jobs are dropped. A running job is marked cancelled and its result discarded;
+        the work itself runs to completion because threads and pool processes cannot be
+        interrupted safely.
+
+        Returns:
+            bool: True if the job was cancelled, False if it had already finished.
+        """
+        if job.status in FINISHED:
+            return False
+        if not job.future.cancel():
+            job.status = CANCELLED
+            job.finished = time.time()
+            self._Notify(job)
+        return True
+
+    def Active(self) -> List[Job]:
+        """Returns the jobs that are queued or running."""
+        with self._jobs_lock:
+            return [job for job in self.jobs.values() if job.status not in FINISHED]
+
+    def Shutdown(self, wait: bool = False) -> None:
+        """Drops queued jobs and stops the pools."""
+        self._threads.shutdown(wait=wait, cancel_futures=True)
+        self._dispatchers.shutdown(wait=wait, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=True)
+            if self._progress_reader.is_alive():
+                # Let the reader drain and exit before the queue is torn down at interpreter exit
+                self._progress_queue.put(None)
+                self._progress_reader.join(timeout=5)
+                self._progress_queue.close()
+                for reply_queue in self._reply_queues:
+                    reply_queue.close()
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+MANIFEST_FILE = "./Cache/manifest.sqlite"
+
+
+class ScrapeManifest:
+    """
+    Records every image URL downloaded into a folder, with its validators and content hash.
+
+    Re-scrapes use it to skip URLs that were already fetched, to send conditional requests
+    with the stored ETag/Last-Modified, and to find the content-addressed file for a URL.
+    One instance may be shared between download threads.
+    """
+
+    def __init__(self, path: str = MANIFEST_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                folder TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (folder, url)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS images_sha256 ON images (folder, sha256)")
+        self._db.commit()
+
+    def Get(self, folder: str, url: str) -> Optional[dict]:
+        """Returns the manifest entry for a URL in a folder, or None if it was never fetched."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, sha256, path, fetched_at FROM images WHERE folder = ? AND url = ?",
+                (os.path.abspath(folder), url),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("etag", "last_modified", "sha256", "path", "fetched_at"), row))
+
+    def Put(self, folder: str, url: str, sha256: str, path: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Records or refreshes the entry for a downloaded URL."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(folder), url, etag, last_modified, sha256, path, time.time()),
+            )
+            self._db.commit()
+
+    def Touch(self, folder: str, url: str) -> None:
+        """Marks an entry as revalidated without changing its content."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE images SET fetched_at = ? WHERE folder = ? AND url = ?",
+                (time.time(), os.path.abspath(folder), url),
+            )
+            self._db.commit()
+
+    def Close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ScrapeManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.Close()
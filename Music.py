@@ -1,16 +1,27 @@
 import re
 from datetime import datetime
-import yt_dlp
+import hashlib
+import json
 import logging
 import subprocess
 import os
-import shlex
+import time
+import shutil
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from Timing import Span, Timed
+from Workspace import FileLock, JobWorkspace, Publish, WriteAtomic
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Downloaded segments are cached by content key and evicted least recently used first.
+MUSIC_CACHE_DIR = "./Cache/Music"
+MUSIC_CACHE_MAX_BYTES = 2 * 1024**3
+MUSIC_CACHE_GRACE_SECONDS = 10 * 60  # Recently used entries may still be read by a running job
+
 
 def GetDuration(file_path, timeout=None):
     """
@@ -35,7 +46,7 @@ def GetDuration(file_path, timeout=None):
                 "format=duration",
                 "-of",
                 "default=noprint_wrappers=1:nokey=1",
-                shlex.quote(file_path),
+                file_path,
             ],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -63,99 +74,278 @@ def ParseTime(time_str: str) -> int:
     return time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
 
 
-def GetMusic(url: str, start: str, end: str) -> int:
+def NormalizeVideoID(url: str) -> str:
+    """
+    Reduces a music URL to a stable identifier so equivalent links share cache entries.
+
+    YouTube watch, youtu.be, shorts and music.youtube links map to "youtube:<id>";
+    other URLs map to the URL without its query string.
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().removeprefix("www.").removeprefix("m.")
+    if host in ("youtube.com", "music.youtube.com"):
+        video_id = parse_qs(parsed.query).get("v", [None])[0]
+        if not video_id and parsed.path.startswith(("/shorts/", "/embed/", "/live/")):
+            video_id = parsed.path.split("/")[2]
+        if video_id:
+            return f"youtube:{video_id}"
+    if host == "youtu.be" and parsed.path.strip("/"):
+        return f"youtube:{parsed.path.strip('/').split('/')[0]}"
+    return f"{host}{parsed.path}"
+
+
+def SegmentKey(url: str, start_seconds: int, end_seconds: int) -> str:
+    """Returns the cache key for a music segment."""
+    ident = f"{NormalizeVideoID(url)}|{start_seconds}|{end_seconds}"
+    return hashlib.sha256(ident.encode()).hexdigest()
+
+
+def _HashFile(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def LookupSegment(key: str) -> Optional[dict]:
+    """
+    Returns the metadata of a cached segment if it exists and passes its integrity check.
+
+    The entry's mtime is refreshed on a hit so eviction is least recently used.
+    Corrupt entries are removed.
+
+    Returns:
+        Optional[dict]: {"path", "title", "duration", "size", "sha256"} or None on a miss.
+    """
+    audio_path = os.path.join(MUSIC_CACHE_DIR, f"{key}.mp3")
+    meta_path = os.path.join(MUSIC_CACHE_DIR, f"{key}.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if os.path.getsize(audio_path) != meta["size"] or _HashFile(audio_path) != meta["sha256"]:
+            raise ValueError("checksum mismatch")
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Discarding corrupt music cache entry {key}: {e}")
+        for path in (audio_path, meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return None
+
+    os.utime(audio_path)
+    meta["path"] = audio_path
+    return meta
+
+
+def StoreSegment(key: str, music_file: str, title: str, duration: int) -> dict:
+    """
+    Moves a downloaded segment into the cache and evicts old entries if over budget.
+
+    Returns:
+        dict: The stored entry's metadata, as returned by LookupSegment.
+    """
+    os.makedirs(MUSIC_CACHE_DIR, exist_ok=True)
+    audio_path = os.path.join(MUSIC_CACHE_DIR, f"{key}.mp3")
+    meta_path = os.path.join(MUSIC_CACHE_DIR, f"{key}.json")
+    meta = {
+        "title": title,
+        "duration": duration,
+        "size": os.path.getsize(music_file),
+        "sha256": _HashFile(music_file),
+    }
+
+    # The sidecar is renamed into place after the audio is published, so a visible sidecar always has complete audio
+    with WriteAtomic(meta_path) as f:
+        json.dump(meta, f)
+        Publish(music_file, audio_path)
+
+    EvictSegments()
+    meta["path"] = audio_path
+    return meta
+
+
+def EvictSegments(max_bytes: int = None) -> None:
+    """
+    Removes least recently used segments until the cache fits within max_bytes.
+    Entries used within MUSIC_CACHE_GRACE_SECONDS are kept since a running job may be reading them.
+
+    Parameters:
+        max_bytes (int): Size budget in bytes, defaults to MUSIC_CACHE_MAX_BYTES.
+    """
+    max_bytes = MUSIC_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(MUSIC_CACHE_DIR):
+        return
+    entries = []
+    with os.scandir(MUSIC_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - MUSIC_CACHE_GRACE_SECONDS
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes or mtime > cutoff:
+            break
+        for stale in (path, os.path.splitext(path)[0] + ".json"):
+            if os.path.exists(stale):
+                os.remove(stale)
+        total -= size
+        logging.info(f"Evicted music cache entry: {path}")
+
+
+def _ValidateSegment(url: str, start: str, end: str) -> tuple:
+    """Validates a segment request and returns (url, start_seconds, end_seconds)."""
+    # Validate URL
+    if not isinstance(url, str) or not url.startswith("http"):
+        raise ValueError("Invalid URL provided.")
+
+    # Validate time format
+    time_pattern = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?$")
+    if not time_pattern.match(start) or not time_pattern.match(end):
+        raise ValueError(
+            "Start and end times must be in the format MM:SS or HH:MM:SS."
+        )
+
+    # Clean URL
+    if "&" in url:
+        url = url.split("&")[0]
+        logging.info(f"Cleaned URL: {url}")
+
+    start_seconds = ParseTime(start)
+    end_seconds = ParseTime(end)
+    if end_seconds <= start_seconds:
+        raise ValueError("End time must be greater than start time.")
+    return url, start_seconds, end_seconds
+
+
+def _DownloadSegment(url: str, start: str, end: str, expected_duration: int, workdir: str) -> str:
+    """Downloads and trims a segment into workdir, returning the mp3 path."""
+    import yt_dlp
+
+    # Set ffmpeg arguments
+    ffmpeg_args = {"ffmpeg_i": ["-ss", start, "-to", end]}
+
+    # Set options for yt_dlp
+    opts = {
+        "external_downloader": "ffmpeg",
+        "external_downloader_args": ffmpeg_args,
+        "format": "bestaudio/best",
+        "postprocessors": [
+            {
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": "192",
+            }
+        ],
+        "outtmpl": os.path.join(workdir, "%(title)s.%(ext)s"),
+        "quiet": True,
+    }
+
+    # Download the music
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        ydl.download([url])
+
+    # Find the downloaded music file
+    music_file = next((f for f in os.listdir(workdir) if f.endswith(".mp3")), None)
+    if not music_file:
+        raise FileNotFoundError("Music file not found after download.")
+    music_file = os.path.join(workdir, music_file)
+
+    # Get the actual duration of the downloaded file
+    actual_duration = GetDuration(music_file)
+
+    # Compare durations and adjust if necessary
+    if actual_duration != expected_duration:
+        difference = actual_duration - expected_duration
+        if difference > 0:
+            # Trim the difference from the beginning of the music file
+            trimmed_file = os.path.join(workdir, f"trimmed_{os.path.basename(music_file)}")
+            with subprocess.Popen(
+                [
+                    "ffmpeg",
+                    "-i",
+                    music_file,
+                    "-ss",
+                    str(difference),
+                    "-t",
+                    str(expected_duration),
+                    "-c",
+                    "copy",
+                    trimmed_file,
+                    "-y",
+                    "-loglevel",
+                    "error",
+                ]
+            ) as proc:
+                proc.wait()
+            os.remove(music_file)
+            os.rename(trimmed_file, music_file)
+
+    return music_file
+
+
+@Timed()
+def GetCachedMusic(url: str, start: str, end: str) -> dict:
+    """
+    Returns a music segment from the local cache, downloading it only on a miss.
+
+    Segments are keyed by normalized video ID plus start and end, so the same track and
+    window is fetched and transcoded once. The returned file belongs to the cache and
+    must not be modified or deleted by the caller. Concurrent requests for the same
+    segment wait for a single download instead of fetching it twice.
+
+    :param url: URL of the music video.
+    :param start: Start time in "MM:SS" or "HH:MM:SS" format.
+    :param end: End time in "MM:SS" or "HH:MM:SS" format.
+    :return: {"path", "title", "duration", "size", "sha256"} for the cached segment.
+    """
+    url, start_seconds, end_seconds = _ValidateSegment(url, start, end)
+    key = SegmentKey(url, start_seconds, end_seconds)
+
+    meta = LookupSegment(key)
+    if meta:
+        logging.info(f"Music cache hit: {meta['title']} ({start}-{end})")
+        return meta
+
+    with FileLock(os.path.join(MUSIC_CACHE_DIR, f"{key}.lock")):
+        # Another job may have downloaded the segment while we waited for the lock
+        meta = LookupSegment(key)
+        if meta:
+            return meta
+
+        expected_duration = end_seconds - start_seconds
+        with JobWorkspace(prefix="music_") as workdir:
+            with Span("download"):
+                music_file = _DownloadSegment(url, start, end, expected_duration, workdir)
+            title = os.path.splitext(os.path.basename(music_file))[0]
+            with Span("store"):
+                return StoreSegment(key, music_file, title, expected_duration)
+
+
+@Timed()
+def GetMusic(url: str, start: str, end: str, output_dir: str = ".") -> Optional[Tuple[str, int]]:
     """
     Downloads a segment of audio from a given URL using yt_dlp and ffmpeg,
     ensuring the segment is within specified start and end times.
+    Segments are served from the local music cache when available.
 
     :param url: URL of the music video.
     :param start: Start time in "MM:SS" or "HH:MM:SS" format.
     :param end: End time in "MM:SS" or "HH:MM:SS" format.
-    :return: Expected duration of the downloaded audio segment in seconds.
+    :param output_dir: Directory the mp3 is written to; use a job workspace when running concurrently.
+    :return: (path of the mp3, expected duration in seconds), or None on failure.
     """
-    try:
-        # Validate URL
-        if not isinstance(url, str) or not url.startswith("http"):
-            raise ValueError("Invalid URL provided.")
-
-        # Validate time format
-        time_pattern = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?$")
-        if not time_pattern.match(start) or not time_pattern.match(end):
-            raise ValueError(
-                "Start and end times must be in the format MM:SS or HH:MM:SS."
-            )
-
-        # Clean URL
-        if "&" in url:
-            url = url.split("&")[0]
-            logging.info(f"Cleaned URL: {url}")
-
-        # Calculate expected duration
-        start_seconds = ParseTime(start)
-        end_seconds = ParseTime(end)
-        if end_seconds <= start_seconds:
-            raise ValueError("End time must be greater than start time.")
-        expected_duration = end_seconds - start_seconds
+    import yt_dlp
 
-        # Set ffmpeg arguments
-        ffmpeg_args = {"ffmpeg_i": ["-ss", start, "-to", end]}
-
-        # Set options for yt_dlp
-        opts = {
-            "external_downloader": "ffmpeg",
-            "external_downloader_args": ffmpeg_args,
-            "format": "bestaudio/best",
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                }
-            ],
-            "outtmpl": "%(title)s.%(ext)s",
-            "quiet": True,
-        }
-
-        # Download the music
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            ydl.download([url])
-
-        # Find the downloaded music file
-        music_file = next((f for f in os.listdir(".") if f.endswith(".mp3")), None)
-        if not music_file:
-            raise FileNotFoundError("Music file not found after download.")
-
-        # Get the actual duration of the downloaded file
-        actual_duration = GetDuration(music_file)
-
-        # Compare durations and adjust if necessary
-        if actual_duration != expected_duration:
-            difference = actual_duration - expected_duration
-            if difference > 0:
-                # Trim the difference from the beginning of the music file
-                trimmed_file = os.path.join(".", f"trimmed_{music_file}")
-                with subprocess.Popen(
-                    [
-                        "ffmpeg",
-                        "-i",
-                        music_file,
-                        "-ss",
-                        str(difference),
-                        "-t",
-                        str(expected_duration),
-                        "-c",
-                        "copy",
-                        trimmed_file,
-                        "-y",
-                        "-loglevel",
-                        "error",
-                    ]
-                ) as proc:
-                    proc.wait()
-                os.remove(music_file)
-                os.rename(trimmed_file, music_file)
-
-        return expected_duration
+    try:
+        meta = GetCachedMusic(url, start, end)
+        os.makedirs(output_dir, exist_ok=True)
+        music_file = os.path.join(output_dir, f"{meta['title']}.mp3")
+        shutil.copyfile(meta["path"], music_file)
+        return music_file, meta["duration"]
 
     except yt_dlp.utils.DownloadError as e:
         logging.error(f"Download error: {e}")
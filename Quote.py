@@ -1,25 +1,211 @@
 import requests
+import atexit
+import collections
+import json
 import logging
+import queue
 import re
+import threading
+from typing import Optional
+
+from Workspace import WriteAtomic
 
 logging.basicConfig(level=logging.INFO)
 
-def GetQuote() -> str:
+QUOTE_API_URL = "https://stoic.tekloon.net/stoic-quote"
+MAX_QUOTE_LENGTH = 150
+QUOTE_POOL_SIZE = 20  # Validated quotes kept ready by the prefetcher
+QUOTE_CACHE_FILE = "./Cache/quotes.json"  # Unused quotes carried over between runs
+QUOTE_TIMEOUT = 30  # Seconds GetQuote waits for the prefetcher before giving up
+QUOTE_MAX_MISSES = 10  # Failed or unusable fetches in a row before the API is considered down
+QUOTE_BACKOFF = 0.5  # Seconds before refetching after an unusable quote, doubled after every failed request
+QUOTE_MAX_BACKOFF = 30
+QUOTE_COOLDOWN = 60  # Seconds the prefetcher rests after QUOTE_MAX_MISSES misses
+RECENT_QUOTES = 100  # Served quotes remembered to avoid immediate repeats
+
+
+def CleanQuote(text: str) -> str:
+    """Normalizes a quote for rendering: drops characters the overlay fonts may lack and collapses whitespace."""
+    # Use regex to remove unwanted characters
+    return " ".join(re.sub(r"[^a-zA-Z0-9.,'\s]", "", text).split())
+
+
+class QuotePrefetcher:
     """
-    Fetches a stoic quote from an API and returns it if the quote is valid.
-    A valid quote is not None and has a length of 150 characters or less.
+    Keeps a bounded queue of validated, deduplicated quotes filled from a background thread.
+
+    Requests share one keep-alive session and back off exponentially on failure. Quotes
+    still queued at exit are saved to QUOTE_CACHE_FILE and queued again on the next run,
+    so most calls to Get return immediately without touching the network.
     """
-    url = "https://stoic.tekloon.net/stoic-quote"
-    while True:
+
+    def __init__(self, size: int = QUOTE_POOL_SIZE, cache_file: str = QUOTE_CACHE_FILE, url: str = QUOTE_API_URL):
+        self.url = url
+        self.cache_file = cache_file
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=size)
+        self._queued = set()
+        self._recent = collections.deque(maxlen=RECENT_QUOTES)
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._down = threading.Event()  # Set while the API has failed QUOTE_MAX_MISSES times in a row
+        self._thread: Optional[threading.Thread] = None
+
+        for quote in self._LoadCache()[:size]:
+            if quote not in self._queued:
+                self._queued.add(quote)
+                self._queue.put_nowait(quote)
+
+    def _LoadCache(self) -> list:
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def _Offer(self, quote: str) -> bool:
+        """Queues a quote unless it is queued already or was served recently."""
+        with self._lock:
+            if quote in self._queued or quote in self._recent:
+                return False
+            self._queued.add(quote)
+        while not self._stop.is_set():
+            try:
+                self._queue.put(quote, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _Fetch(self) -> Optional[str]:
+        """Fetches one quote and returns it cleaned, or None if it is missing or too long."""
+        response = self._session.get(self.url, timeout=10)
+        response.raise_for_status()
+        quote = response.json().get("data", {}).get("quote")
+        if quote and len(quote) <= MAX_QUOTE_LENGTH:
+            return CleanQuote(quote)
+        return None
+
+    def _Fill(self) -> None:
+        try:
+            self._FillUntilStopped()
+        finally:
+            self._session.close()
+
+    def _FillUntilStopped(self) -> None:
+        misses = 0
+        backoff = QUOTE_BACKOFF
+        while not self._stop.is_set():
+            try:
+                quote = self._Fetch()
+                backoff = QUOTE_BACKOFF
+                if quote and self._Offer(quote):
+                    misses = 0
+                    self._down.clear()
+                    continue
+                # Too long, empty or a repeat: an API serving only these is as good as down
+                logging.info("Quote Too Long, None or Repeated, Trying Again")
+                misses += 1
+                self._stop.wait(QUOTE_BACKOFF)
+            except (requests.RequestException, ValueError) as e:
+                logging.error(f"Request failed: {e}")
+                misses += 1
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, QUOTE_MAX_BACKOFF)
+
+            if misses >= QUOTE_MAX_MISSES:
+                logging.error(f"No usable quote after {misses} attempts, retrying in {QUOTE_COOLDOWN}s")
+                self._down.set()
+                self._stop.wait(QUOTE_COOLDOWN)
+                misses = 0
+
+    def Start(self) -> "QuotePrefetcher":
+        """Starts the background fill thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._Fill, name="QuotePrefetcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def Get(self, timeout: float = QUOTE_TIMEOUT) -> str:
+        """
+        Takes the next quote from the queue, waiting up to timeout for one to be fetched.
+
+        Raises:
+            RuntimeError: If no quote is available in time, or the API is down and the queue is empty.
+        """
+        self.Start()
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            json_data = response.json()
-            quote = json_data.get("data", {}).get("quote")
-
-            if quote and len(quote) <= 150:
-                # Use regex to remove unwanted characters
-                return re.sub(r"[^a-zA-Z0-9.,'\s]", "", quote)
-            logging.info("Quote Too Long or None, Trying Again")
-        except requests.RequestException as e:
-            logging.error(f"Request failed: {e}")
\ No newline at end of file
+            quote = self._queue.get_nowait()
+        except queue.Empty:
+            if self._down.is_set():
+                raise RuntimeError("No quote available: the quote API is unreachable.")
+            try:
+                quote = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                raise RuntimeError(f"No quote available after waiting {timeout}s.")
+        with self._lock:
+            self._queued.discard(quote)
+            self._recent.append(quote)
+        return quote
+
+    def Save(self) -> None:
+        """Writes the quotes still queued to the cache file."""
+        with self._queue.mutex:
+            quotes = list(self._queue.queue)
+        with WriteAtomic(self.cache_file) as f:
+            json.dump(quotes, f)
+
+    def Stop(self) -> None:
+        """
+        Signals the fill thread to stop and saves the unused quotes.
+
+        The thread is not joined: it is a daemon and exits, closing its session, after the
+        request in flight, so closing the app never waits on the quote API.
+        """
+        self._stop.set()
+        self.Save()
+
+
+_prefetcher: Optional[QuotePrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def GetPrefetcher() -> QuotePrefetcher:
+    """
+    Returns the shared prefetcher, starting it on first use. Unused quotes are saved at exit.
+
+    GetQuote is the first use, so nothing is fetched until a quote is actually needed.
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = QuotePrefetcher().Start()
+            atexit.register(_prefetcher.Stop)
+        return _prefetcher
+
+
+def GetQuote(timeout: float = QUOTE_TIMEOUT) -> str:
+    """
+    Returns a stoic quote of 150 characters or less from the background prefetch queue.
+
+    If the API cannot be reached in time, an unused quote is taken from the offline
+    QuoteStore instead.
+
+    Parameters:
+        timeout (float): Seconds to wait when the queue is empty.
+
+    Raises:
+        RuntimeError: If no quote could be fetched in time and the offline store has none.
+    """
+    try:
+        return GetPrefetcher().Get(timeout)
+    except RuntimeError as e:
+        from QuoteStore import QuoteStore
+
+        with QuoteStore() as store:
+            stored = store.RandomQuote(max_len=MAX_QUOTE_LENGTH)
+        if stored is None:
+            raise
+        logging.warning(f"{e} Using a quote from the offline store.")
+        return stored["text"]
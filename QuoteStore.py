@@ -0,0 +1,371 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Union
+
+import requests
+
+from Quote import MAX_QUOTE_LENGTH, QUOTE_API_URL, CleanQuote
+
+logging.basicConfig(level=logging.INFO)
+
+QUOTE_DB_FILE = "./Cache/quotes.sqlite"
+WIKIQUOTE_API_URL = "https://en.wikiquote.org/w/api.php"
+# Wikiquote sections whose bullets are not sayings of the page's subject
+WIKIQUOTE_SKIP_SECTIONS = re.compile(r"disputed|misattributed|quotes about|about |external links|see also|sources", re.I)
+INGEST_BATCH = 5000  # Rows per executemany during bulk ingest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE,
+    author TEXT,
+    length INTEGER NOT NULL,
+    source TEXT,
+    used_at REAL
+);
+CREATE INDEX IF NOT EXISTS quotes_author ON quotes (author COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS quotes_length ON quotes (length);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    quote_id INTEGER NOT NULL REFERENCES quotes (id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, quote_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5 (
+    text, author, content='quotes', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS quotes_ai AFTER INSERT ON quotes BEGIN
+    INSERT INTO quotes_fts (rowid, text, author) VALUES (new.id, new.text, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_ad AFTER DELETE ON quotes BEGIN
+    INSERT INTO quotes_fts (quotes_fts, rowid, text, author) VALUES ('delete', old.id, old.text, old.author);
+END;
+"""
+
+
+class QuoteStore:
+    """
+    Offline quote corpus in SQLite, indexed by author, length and tag with full-text search.
+
+    Quotes are cleaned with CleanQuote on ingest and stored once per distinct text. Random
+    selection seeks to a random id and takes the next matching row, so picking a quote costs
+    a single index lookup however large the corpus is and never touches the network.
+    One instance may be shared between threads.
+    """
+
+    def __init__(self, path: str = QUOTE_DB_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def __enter__(self) -> "QuoteStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.Close()
+
+    def Add(self, quotes: Iterable[Union[str, dict]], source: Optional[str] = None, tags: Iterable[str] = ()) -> int:
+        """
+        Bulk-inserts quotes, skipping any whose cleaned text is already stored.
+
+        Parameters:
+            quotes (Iterable[Union[str, dict]]): Quote texts, or dicts with "text" (or "quote"),
+                optional "author" and optional "tags".
+            source (Optional[str]): Where the quotes came from, e.g. "stoic-api" or a file name.
+            tags (Iterable[str]): Tags applied to every quote in addition to its own.
+
+        Returns:
+            int: Number of new quotes stored.
+        """
+        common_tags = [tag.strip().lower() for tag in tags if tag.strip()]
+        added = 0
+        batch = []
+
+        def Flush() -> int:
+            with self._lock, self._db:
+                inserted = self._db.executemany(
+                    "INSERT OR IGNORE INTO quotes (text, author, length, source) VALUES (?, ?, ?, ?)",
+                    [row[:4] for row in batch],
+                ).rowcount
+                tag_rows = [(tag, row[0]) for row in batch for tag in row[4]]
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO tags (tag, quote_id) SELECT ?, id FROM quotes WHERE text = ?",
+                    tag_rows,
+                )
+            batch.clear()
+            return inserted
+
+        for quote in quotes:
+            if isinstance(quote, str):
+                quote = {"text": quote}
+            text = CleanQuote(quote.get("text") or quote.get("quote") or "")
+            if not text:
+                continue
+            author = (quote.get("author") or "").strip() or None
+            quote_tags = quote.get("tags") or []
+            if isinstance(quote_tags, str):
+                quote_tags = quote_tags.split(",")
+            all_tags = sorted(set(common_tags + [tag.strip().lower() for tag in quote_tags if tag.strip()]))
+            batch.append((text, author, len(text), source, all_tags))
+            if len(batch) >= INGEST_BATCH:
+                added += Flush()
+        if batch:
+            added += Flush()
+        logging.info(f"Stored {added} new quotes from {source or 'input'}")
+        return added
+
+    def _Filters(self, max_len, min_len, author, tag, unused) -> tuple:
+        """Builds the WHERE clause and parameters shared by RandomQuote and Count."""
+        joins, clauses, params = "", [], []
+        if tag:
+            joins = " JOIN tags ON tags.quote_id = quotes.id AND tags.tag = ?"
+            params.append(tag.lower())
+        if max_len is not None:
+            clauses.append("quotes.length <= ?")
+            params.append(max_len)
+        if min_len is not None:
+            clauses.append("quotes.length >= ?")
+            params.append(min_len)
+        if author:
+            clauses.append("quotes.author = ? COLLATE NOCASE")
+            params.append(author)
+        if unused:
+            clauses.append("quotes.used_at IS NULL")
+        return joins, clauses, params
+
+    def RandomQuote(
+        self,
+        max_len: Optional[int] = MAX_QUOTE_LENGTH,
+        min_len: Optional[int] = None,
+        author: Optional[str] = None,
+        tag: Optional[str] = None,
+        unused: bool = True,
+        mark_used: bool = True,
+    ) -> Optional[dict]:
+        """
+        Picks a random quote matching the filters.
+
+        A random id is drawn and the first matching quote at or after it is returned,
+        wrapping around to the start. The cost depends on how selective the filters are,
+        not on the size of the corpus; quotes following long runs of non-matching ids are
+        picked somewhat more often.
+
+        Parameters:
+            max_len (Optional[int]): Maximum length in characters.
+            min_len (Optional[int]): Minimum length in characters.
+            author (Optional[str]): Only quotes by this author (case-insensitive).
+            tag (Optional[str]): Only quotes with this tag.
+            unused (bool): Skip quotes that were already used.
+            mark_used (bool): Record the returned quote as used.
+
+        Returns:
+            Optional[dict]: {"id", "text", "author", "length", "source"}, or None if nothing matches.
+        """
+        joins, clauses, params = self._Filters(max_len, min_len, author, tag, unused)
+        # Seek on the tag index when filtering by tag so the rows come out already in id order
+        key = "tags.quote_id" if tag else "quotes.id"
+        query = (
+            "SELECT quotes.id, quotes.text, quotes.author, quotes.length, quotes.source FROM quotes"
+            f"{joins} WHERE {' AND '.join(clauses + [key + ' {} ?'])} ORDER BY {key} LIMIT 1"
+        )
+        with self._lock:
+            # Separate statements so each is answered from the end of the primary key
+            low = self._db.execute("SELECT MIN(id) FROM quotes").fetchone()[0]
+            high = self._db.execute("SELECT MAX(id) FROM quotes").fetchone()[0]
+            if low is None:
+                return None
+            start = random.randint(low, high)
+            row = self._db.execute(query.format(">="), params + [start]).fetchone()
+            if row is None:
+                row = self._db.execute(query.format("<"), params + [start]).fetchone()
+            if row is None:
+                return None
+            if mark_used:
+                with self._db:
+                    self._db.execute("UPDATE quotes SET used_at = ? WHERE id = ?", (time.time(), row[0]))
+        return dict(zip(("id", "text", "author", "length", "source"), row))
+
+    def Search(self, query: str, limit: int = 20) -> List[dict]:
+        """Full-text search over quote text and author, best matches first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT quotes.id, quotes.text, quotes.author, quotes.length, quotes.source FROM quotes_fts"
+                " JOIN quotes ON quotes.id = quotes_fts.rowid WHERE quotes_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [dict(zip(("id", "text", "author", "length", "source"), row)) for row in rows]
+
+    def Count(self, **filters) -> int:
+        """Counts quotes matching the RandomQuote filters (max_len, min_len, author, tag, unused)."""
+        joins, clauses, params = self._Filters(
+            filters.get("max_len"), filters.get("min_len"), filters.get("author"), filters.get("tag"), filters.get("unused", False)
+        )
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM quotes{joins}{where}", params).fetchone()[0]
+
+    def MarkUsed(self, quote_id: int) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE quotes SET used_at = ? WHERE id = ?", (time.time(), quote_id))
+
+    def ResetUsed(self) -> None:
+        """Makes every quote available to RandomQuote again."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE quotes SET used_at = NULL WHERE used_at IS NOT NULL")
+
+    def Close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def FetchStoicQuotes(count: int, session: Optional[requests.Session] = None) -> List[dict]:
+    """
+    Fetches up to count quotes from the stoic quote API.
+
+    Parameters:
+        count (int): Number of requests to make; repeats are dropped on ingest.
+        session (Optional[requests.Session]): Session to reuse connections from.
+    """
+    session = session or requests.Session()
+    quotes = []
+    for _ in range(count):
+        try:
+            response = session.get(QUOTE_API_URL, timeout=10)
+            response.raise_for_status()
+            data = response.json().get("data", {})
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Request failed: {e}")
+            continue
+        if data.get("quote"):
+            quotes.append({"text": data["quote"], "author": data.get("author"), "tags": ["stoic"]})
+    return quotes
+
+
+def _StripWikitext(text: str) -> str:
+    """Removes links, templates, references, markup and HTML from a line of wikitext."""
+    text = re.sub(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>", "", text)
+    text = re.sub(r"\{\{[^{}]*\}\}", "", text)
+    text = re.sub(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]", r"\1", text)
+    text = re.sub(r"\[https?://\S+\s*([^\]]*)\]", r"\1", text)
+    text = re.sub(r"<[^>]+>", "", text)
+    return text.replace("'''", "").replace("''", "").strip()
+
+
+def ScrapeWikiquote(subject: str, session: Optional[requests.Session] = None) -> List[dict]:
+    """
+    Collects the sayings listed on a Wikiquote page.
+
+    Only top-level bullets are taken; nested bullets are citations. Sections such as
+    "Disputed", "Misattributed" and "Quotes about" are skipped. Each quote is tagged with
+    the section it was listed under.
+
+    Parameters:
+        subject (str): Page title, e.g. "Albert Einstein" or "albert einstein".
+        session (Optional[requests.Session]): Session to reuse connections from.
+
+    Returns:
+        List[dict]: Quotes with text, author (the page title) and tags.
+    """
+    session = session or requests.Session()
+    response = session.get(
+        WIKIQUOTE_API_URL,
+        params={"action": "parse", "page": subject, "prop": "wikitext", "format": "json", "redirects": 1},
+        timeout=30,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if "error" in data:
+        raise ValueError(f"Wikiquote page not found: {subject} ({data['error'].get('info')})")
+    title = data["parse"]["title"]
+    quotes = []
+    section = ""
+    for line in data["parse"]["wikitext"]["*"].splitlines():
+        heading = re.match(r"^(=+)\s*(.*?)\s*\1\s*$", line)
+        if heading:
+            section = heading.group(2)
+            continue
+        if not line.startswith("* ") or (section and WIKIQUOTE_SKIP_SECTIONS.search(section)):
+            continue
+        text = _StripWikitext(line[2:])
+        if text:
+            quotes.append({"text": text, "author": title, "tags": [section.lower()] if section else []})
+    logging.info(f"Found {len(quotes)} quotes on Wikiquote page {title}")
+    return quotes
+
+
+def ReadQuoteFile(path: str) -> List[dict]:
+    """
+    Reads quotes from a local file.
+
+    .json files hold a list of strings or {"text", "author", "tags"} objects, .csv files have
+    a text (or quote) column and optional author and tags columns, and any other file is
+    read as one quote per line, with an optional " - Author" or " — Author" suffix.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8", newline="") as f:
+        if extension == ".json":
+            return json.load(f)
+        if extension == ".csv":
+            return list(csv.DictReader(f))
+        quotes = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            text, author = line, ""
+            match = re.match(r"^(.*\S)\s+[-–—]+\s+([^-–—]+)$", line)
+            if match:
+                text, author = match.group(1), match.group(2)
+            quotes.append({"text": text.strip('"“” '), "author": author})
+        return quotes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the offline quote store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stoic = commands.add_parser("stoic", help="Ingest quotes from the stoic quote API")
+    stoic.add_argument("count", type=int)
+    wikiquote = commands.add_parser("wikiquote", help="Ingest quotes from Wikiquote pages")
+    wikiquote.add_argument("subjects", nargs="+")
+    files = commands.add_parser("file", help="Ingest quotes from .txt, .csv or .json files")
+    files.add_argument("paths", nargs="+")
+    files.add_argument("--tag", action="append", default=[])
+    pick = commands.add_parser("random", help="Print a random unused quote")
+    pick.add_argument("--max-len", type=int, default=MAX_QUOTE_LENGTH)
+    pick.add_argument("--author")
+    pick.add_argument("--tag")
+    search = commands.add_parser("search", help="Full-text search")
+    search.add_argument("query")
+    args = parser.parse_args()
+
+    with QuoteStore() as store:
+        if args.command == "stoic":
+            store.Add(FetchStoicQuotes(args.count), source="stoic-api")
+        elif args.command == "wikiquote":
+            session = requests.Session()
+            for subject in args.subjects:
+                try:
+                    store.Add(ScrapeWikiquote(subject, session), source="wikiquote")
+                except (requests.RequestException, ValueError) as e:
+                    logging.error(f"Failed to scrape Wikiquote page {subject}: {e}")
+        elif args.command == "file":
+            for path in args.paths:
+                store.Add(ReadQuoteFile(path), source=os.path.basename(path), tags=args.tag)
+        elif args.command == "random":
+            quote = store.RandomQuote(max_len=args.max_len, author=args.author, tag=args.tag)
+            print(f"{quote['text']} - {quote['author']}" if quote else "No matching quote.")
+        elif args.command == "search":
+            for quote in store.Search(args.query):
+                print(f"{quote['text']} - {quote['author']}")
@@ -1,13 +1,31 @@
 from PIL import Image
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
+import hashlib
+import io
+import json
 import logging
 import os
-from urllib.parse import urljoin
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+from Dedupe import DHash, PictureIndex
+from Fetchers import (
+    DRIVER_POOL_SIZE,
+    DRIVER_RECYCLE_PAGES,
+    IDLE_SCROLLS,
+    SCROLL_TIMEOUT,
+    CreateFetchers,
+    DriverPool,
+    ImageURLsWithFallback,
+)
+from Manifest import ScrapeManifest
+from Timing import ReportProgress, Timed
+from Workspace import IMAGE_EXTENSIONS, WriteAtomic
 
 """
 LINKS = {
@@ -28,95 +46,567 @@ if not os.path.exists("Videos"):
     os.makedirs("Videos")
 
 
-def ResizeImages(directory: str) -> None:
+# Download pool defaults
+DOWNLOAD_WORKERS = 8
+PER_HOST_LIMIT = 4  # Concurrent requests allowed against a single host
+DOWNLOAD_TIMEOUT = (5, 30)  # (connect, read) seconds
+DOWNLOAD_RETRIES = 3
+RETRY_BACKOFF = 0.5  # Seconds, doubled after every failed attempt
+# DownloadImages summary counter for each _FetchImage status
+STATUS_COUNTERS = {
+    "downloaded": "downloaded",
+    "duplicate": "duplicates",
+    "near_duplicate": "near_duplicates",
+    "not_modified": "unchanged",
+}
+
+TARGET_SIZE = (1080, 1350)
+RESIZE_STATE_FILE = "./Cache/resized.json"  # Size and mtime of every file ResizeImages has processed
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+def _Downscale(img: Image.Image, size: tuple) -> Image.Image:
+    """
+    Resizes an opened image to size, decoding as little of it as possible.
+
+    JPEGs are decoded at a reduced DCT scale via draft() and large images are shrunk by an
+    integer factor with reduce() before the final LANCZOS pass.
+    """
+    img.draft(img.mode, size)
+    factor_x, factor_y = max(img.width // size[0], 1), max(img.height // size[1], 1)
+    if (factor_x > 1 or factor_y > 1) and img.mode in ("L", "RGB", "RGBA"):
+        img = img.reduce((factor_x, factor_y))
+    return img.resize(size, Image.LANCZOS)
+
+
+def _SaveImage(img: Image.Image, path: str, image_format: str) -> None:
+    """Saves an image over path in one step, in the given format."""
+    if image_format == "JPEG" and img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    with WriteAtomic(path, "wb") as f:
+        img.save(f, format=image_format)
+
+
+def _ResizeImage(task: tuple) -> tuple:
+    """Resizes one file in place. Runs in a worker process; returns (path, status, error)."""
+    path, size = task
+    try:
+        with Image.open(path) as img:  # Only the header is read until pixels are needed
+            if img.size == size:
+                return path, "skipped", None
+            image_format = img.format
+            resized = _Downscale(img, size)
+        _SaveImage(resized, path, image_format)
+        return path, "resized", None
+    except Exception as e:
+        return path, "failed", str(e)
+
+
+def ResizeBytes(content: bytes, size: tuple = TARGET_SIZE) -> bytes:
+    """
+    Resizes an encoded image in memory and returns it re-encoded in its original format.
+
+    Parameters:
+    content (bytes): Encoded image.
+    size (tuple): Target (width, height).
+    """
+    with Image.open(io.BytesIO(content)) as img:
+        if img.size == size:
+            return content
+        image_format = img.format
+        resized = _Downscale(img, size)
+    if image_format == "JPEG" and resized.mode not in ("L", "RGB"):
+        resized = resized.convert("RGB")
+    buffer = io.BytesIO()
+    resized.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def _LoadResizeState() -> dict:
+    try:
+        with open(RESIZE_STATE_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def ResizeImages(directory: str, workers: Optional[int] = None, size: tuple = TARGET_SIZE) -> Dict[str, int]:
     """
     Resizes all image files in the specified directory to 1080x1350 pixels if they are not already that size.
 
+    Files are processed on a pool of worker processes. Files whose size and mtime match the
+    last run are skipped without being opened; other files only have their header read
+    unless they actually need resizing.
+
     Parameters:
     directory (str): The path to the directory containing images to be resized.
+    workers (Optional[int]): Number of worker processes, defaults to the CPU count. 1 runs in-process.
+    size (tuple): Target (width, height).
+
+    Returns:
+    Dict[str, int]: Counts of resized, skipped and failed files.
     """
+    counts = {"resized": 0, "skipped": 0, "failed": 0}
     if not os.path.isdir(directory):
         logging.error(f"Directory {directory} does not exist.")
-        return
+        return counts
 
+    size = tuple(size)
+    state = _LoadResizeState()
+    tasks = []
     try:
         with os.scandir(directory) as entries:
             for entry in entries:
-                if entry.is_file() and entry.name.lower().endswith(
-                    (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff")
-                ):
-                    try:
-                        with Image.open(entry.path) as img:
-                            if img.size != (1080, 1350):
-                                img = img.resize((1080, 1350), Image.LANCZOS)
-                                img.save(entry.path)
-                                logging.info(f"Resized and saved: {entry.path}")
-                            else:
-                                logging.info(
-                                    f"Image {entry.name} is already 1080x1350, skipping resize."
-                                )
-                    except Exception as e:
-                        logging.error(f"Failed to process image {entry.name}: {e}")
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    if state.get(os.path.abspath(entry.path)) == [list(size), stat.st_size, stat.st_mtime]:
+                        counts["skipped"] += 1
+                        continue
+                    tasks.append((entry.path, size))
     except OSError as e:
         logging.error(f"Error accessing directory {directory}: {e}")
+        return counts
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(tasks) > 1 else None
+    if executor:
+        results = executor.map(_ResizeImage, tasks, chunksize=max(len(tasks) // (workers * 4), 1))
+    else:
+        results = map(_ResizeImage, tasks)
+
+    try:
+        for path, status, error in results:
+            counts[status] += 1
+            if status == "failed":
+                logging.error(f"Failed to process image {os.path.basename(path)}: {error}")
+                continue
+            if status == "resized":
+                logging.info(f"Resized and saved: {path}")
+            stat = os.stat(path)
+            state[os.path.abspath(path)] = [list(size), stat.st_size, stat.st_mtime]
+    finally:
+        if executor:
+            executor.shutdown()
+
+    with WriteAtomic(RESIZE_STATE_FILE) as f:
+        json.dump(state, f)
+
+    logging.info(
+        f"Resized {counts['resized']} images in {directory}, "
+        f"{counts['skipped']} already {size[0]}x{size[1]}, {counts['failed']} failed"
+    )
+    return counts
+
+
+def CreateSession(pool_size: int = DOWNLOAD_WORKERS) -> requests.Session:
+    """
+    Creates a keep-alive HTTP session whose connection pool can serve pool_size concurrent requests.
+
+    Parameters:
+    pool_size (int): Maximum number of pooled connections per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def _FetchImage(
+    URL: str,
+    folder: str,
+    session: requests.Session,
+    timeout,
+    manifest: ScrapeManifest,
+    index: Optional[PictureIndex] = None,
+    resize: Optional[tuple] = None,
+) -> tuple:
+    """
+    Downloads one image into content-addressed storage, raising on failure.
+
+    Known URLs are requested conditionally with their stored ETag/Last-Modified. Images are
+    saved as <sha256><ext>, so different images never collide and identical bytes are kept once.
+    With an index, images perceptually close to one already in the folder are not saved.
+    With resize, the image is resized in memory and written once at its final size; the
+    file keeps the name of the downloaded bytes' hash.
+
+    Returns:
+    tuple: (path, bytes received, status) where status is "downloaded", "duplicate",
+    "near_duplicate" or "not_modified".
+    """
+    entry = manifest.Get(folder, URL)
+    headers = {}
+    if entry and os.path.isfile(entry["path"]):
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with session.get(URL, headers=headers, timeout=timeout) as response:
+        if response.status_code == 304 and headers and os.path.isfile(entry["path"]):
+            manifest.Touch(folder, URL)
+            return entry["path"], 0, "not_modified"
+        not_modified = response.status_code == 304
+        if not not_modified:
+            response.raise_for_status()
+            content = response.content
+    if not_modified:
+        # Nothing stored to reuse: the request was unconditional or the file was removed meanwhile
+        logging.warning(f"Not Modified without a stored copy, downloading again: {URL}")
+        with session.get(URL, timeout=timeout) as response:
+            if response.status_code == 304:
+                raise requests.HTTPError(f"304 Not Modified for an unconditional request: {URL}", response=response)
+            response.raise_for_status()
+            content = response.content
+
+    # Name the image by its content hash
+    digest = hashlib.sha256(content).hexdigest()
+    extension = os.path.splitext(urlparse(URL).path)[1].lower()
+    IMGPATH = os.path.join(folder, f"{digest}{extension}")
 
+    status = "duplicate" if os.path.isfile(IMGPATH) else "downloaded"
+    value_hash = DHash(content) if status == "downloaded" and index is not None else None
+    near_duplicate = index.FindDuplicate(value_hash) if value_hash is not None else None
+    if status == "downloaded" and not near_duplicate:
+        with WriteAtomic(IMGPATH, "wb") as FILE:
+            FILE.write(ResizeBytes(content, resize) if resize else content)
+        # Indexed only once the file exists, so a failed write leaves no entry behind
+        if value_hash is not None:
+            near_duplicate = index.CheckAndAdd(IMGPATH, value_hash)
+            if near_duplicate:
+                os.remove(IMGPATH)  # A concurrent download of a near-duplicate was indexed first
+    if near_duplicate:
+        logging.info(f"Rejected near-duplicate of {near_duplicate}: {URL}")
+        IMGPATH, status = near_duplicate, "near_duplicate"
+    elif status == "downloaded":
+        logging.info(f"Saved: {IMGPATH}")
+    else:
+        logging.info(f"Already stored: {IMGPATH}")
 
-def DownloadImage(URL: str, folder: str) -> None:
+    manifest.Put(folder, URL, digest, IMGPATH, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return IMGPATH, len(content), status
+
+
+def DownloadImage(
+    URL: str,
+    folder: str,
+    session: Optional[requests.Session] = None,
+    timeout=DOWNLOAD_TIMEOUT,
+    manifest: Optional[ScrapeManifest] = None,
+    index: Optional[PictureIndex] = None,
+    resize: Optional[tuple] = None,
+) -> Optional[str]:
     """
-    Downloads an image from a given URL and saves it to the specified folder.
+    Downloads an image from a given URL and saves it to the specified folder under its content hash.
 
     Parameters:
     URL (str): The URL of the image to be downloaded.
     folder (str): The path to the folder where the image should be saved.
+    session (Optional[requests.Session]): Session to reuse connections from.
+    timeout: Request timeout in seconds, or a (connect, read) tuple.
+    manifest (Optional[ScrapeManifest]): Manifest of fetched URLs, defaults to the shared one, opened
+        for this call and closed afterwards.
+    index (Optional[PictureIndex]): Perceptual-hash index to reject near-duplicates against.
+    resize (Optional[tuple]): Resize to this (width, height) before writing, e.g. TARGET_SIZE.
+
+    Returns:
+    Optional[str]: Path of the saved image (or of the near-duplicate it matched), or None on failure.
     """
-    if not URL.lower().endswith((".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff")):
+    if not URL.lower().endswith(IMAGE_EXTENSIONS):
         logging.error(f"Invalid image URL: {URL}")
         return
+    owned_manifest = manifest is None
+    manifest = manifest or ScrapeManifest()
     try:
-        with requests.get(URL, stream=True) as response:
-            response.raise_for_status()
+        return _FetchImage(URL, folder, session or requests, timeout, manifest, index, resize)[0]
+    except requests.RequestException as e:
+        logging.error(f"Failed to save image {URL}: {e}")
+    finally:
+        if owned_manifest:
+            manifest.Close()
 
-            # Get the image name from the URL
-            IMGNAME = os.path.basename(URL)
-            IMGPATH = os.path.join(folder, IMGNAME)
 
-            os.makedirs(folder, exist_ok=True)
-            with open(IMGPATH, "wb") as FILE:
-                for chunk in response.iter_content(chunk_size=8192):
-                    FILE.write(chunk)
-            logging.info(f"Saved: {IMGPATH}")
+def _IsRetryable(error: requests.RequestException) -> bool:
+    """Client errors other than 408/429 will not succeed on a retry."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+    return response.status_code in (408, 429) or response.status_code >= 500
 
-    except requests.RequestException as e:
-        logging.error(f"Failed to save image {URL}: {e}")
 
+@Timed()
+def DownloadImages(
+    urls: Iterable[str],
+    folder: str,
+    workers: int = DOWNLOAD_WORKERS,
+    per_host: int = PER_HOST_LIMIT,
+    retries: int = DOWNLOAD_RETRIES,
+    backoff: float = RETRY_BACKOFF,
+    timeout=DOWNLOAD_TIMEOUT,
+    session: Optional[requests.Session] = None,
+    manifest: Optional[ScrapeManifest] = None,
+    revalidate: bool = False,
+    dedupe: bool = True,
+    resize: Optional[tuple] = None,
+) -> Dict[str, object]:
+    """
+    Downloads many images concurrently over a shared keep-alive session.
+
+    Requests to any one host are capped at per_host at a time. Failed requests are retried
+    with exponential backoff and jitter; client errors other than 408/429 are not retried.
+    URLs are consumed lazily, so downloads start while a generator is still producing them.
+    URLs already in the manifest are skipped, or revalidated with conditional requests
+    when revalidate is set, so re-scraping a board only downloads new pins. With dedupe,
+    images perceptually close to one already in the folder are rejected. A session or
+    manifest created here is closed before returning.
+
+    Parameters:
+    urls (Iterable[str]): Image URLs. Duplicates are downloaded once.
+    folder (str): The path to the folder where the images should be saved.
+    workers (int): Size of the download thread pool.
+    per_host (int): Maximum concurrent requests per host.
+    retries (int): Extra attempts after the first failure.
+    backoff (float): Initial delay between attempts in seconds.
+    timeout: Request timeout in seconds, or a (connect, read) tuple.
+    session (Optional[requests.Session]): Session to use, defaults to a new pooled session.
+    manifest (Optional[ScrapeManifest]): Manifest of fetched URLs, defaults to the shared one.
+    revalidate (bool): Send conditional requests for known URLs instead of skipping them.
+    dedupe (bool): Reject near-duplicates using the folder's perceptual-hash index.
+    resize (Optional[tuple]): Resize each image to this (width, height) before writing.
+
+    Returns:
+    Dict[str, object]: Summary with requested, downloaded, duplicates, near_duplicates, unchanged,
+    failed, invalid, bytes, seconds, images_per_second, mb_per_second, paths and errors (URL -> message).
+    """
+    owned_session, owned_manifest = session is None, manifest is None
+    session = session or CreateSession(workers)
+    manifest = manifest or ScrapeManifest()
+    index = PictureIndex(folder) if dedupe else None
+    host_limits: Dict[str, threading.BoundedSemaphore] = {}
+    host_limits_lock = threading.Lock()
+
+    def Download(URL: str) -> tuple:
+        host = urlparse(URL).netloc
+        with host_limits_lock:
+            limit = host_limits.setdefault(host, threading.BoundedSemaphore(per_host))
+        for attempt in range(retries + 1):
+            try:
+                with limit:
+                    return _FetchImage(URL, folder, session, timeout, manifest, index, resize)
+            except requests.RequestException as e:
+                if attempt == retries or not _IsRetryable(e):
+                    raise
+                delay = backoff * 2**attempt * (1 + random.random())
+                logging.warning(f"Retrying {URL} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    summary = {
+        "requested": 0,
+        "downloaded": 0,
+        "duplicates": 0,
+        "near_duplicates": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "invalid": 0,
+        "bytes": 0,
+        "paths": [],
+        "errors": {},
+    }
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            seen = set()
+            futures = {}
+            for URL in urls:
+                if URL in seen:
+                    continue
+                seen.add(URL)
+                summary["requested"] += 1
+                if not URL.lower().endswith(IMAGE_EXTENSIONS):
+                    summary["invalid"] += 1
+                    continue
+
+                # Skip URLs fetched on an earlier run whose file is still present
+                entry = None if revalidate else manifest.Get(folder, URL)
+                if entry and os.path.isfile(entry["path"]):
+                    summary["unchanged"] += 1
+                    summary["paths"].append(entry["path"])
+                    continue
+                futures[executor.submit(Download, URL)] = URL
 
-def ScrapeImages(url: str, folder: str, MAX: int) -> None:
-    """Scrape images from a webpage and download those containing '236x' in their URL.
+            for completed, future in enumerate(as_completed(futures), 1):
+                URL = futures[future]
+                ReportProgress({"done": completed, "total": len(futures), "fraction": completed / len(futures)})
+                try:
+                    path, size, status = future.result()
+                    summary[STATUS_COUNTERS[status]] += 1
+                    summary["bytes"] += size
+                    summary["paths"].append(path)
+                except Exception as e:
+                    summary["failed"] += 1
+                    summary["errors"][URL] = str(e)
+                    logging.error(f"Failed to save image {URL}: {e}")
+
+        if index is not None:
+            index.Save()
+    finally:
+        if owned_manifest:
+            manifest.Close()
+        if owned_session:
+            session.close()
+
+    seconds = time.perf_counter() - start
+    summary["seconds"] = seconds
+    summary["images_per_second"] = summary["downloaded"] / seconds if seconds else 0.0
+    summary["mb_per_second"] = summary["bytes"] / 1e6 / seconds if seconds else 0.0
+    logging.info(
+        f"Downloaded {summary['downloaded']}/{summary['requested'] - summary['invalid']} images "
+        f"({summary['bytes'] / 1e6:.1f} MB) in {seconds:.1f}s, "
+        f"{summary['images_per_second']:.1f} img/s, {summary['mb_per_second']:.2f} MB/s, "
+        f"{summary['unchanged']} unchanged, {summary['duplicates']} duplicates, "
+        f"{summary['near_duplicates']} near-duplicates, "
+        f"{summary['failed']} failed, {summary['invalid']} invalid"
+    )
+    return summary
+
+
+@Timed()
+def ScrapeImages(
+    url: str,
+    folder: str,
+    MAX: Optional[int],
+    workers: int = DOWNLOAD_WORKERS,
+    resize: Optional[tuple] = None,
+    headless: bool = False,
+    idle_scrolls: int = IDLE_SCROLLS,
+    scroll_timeout: float = SCROLL_TIMEOUT,
+    backend: str = "auto",
+) -> Optional[dict]:
+    """Scrape images from a board or profile page and download them.
+
+    Image URLs are listed by a fetcher and downloaded while listing continues. The "http"
+    backend pages through Pinterest's JSON endpoints without a browser; "selenium" scrolls
+    the page in Chrome; "auto" tries HTTP first and falls back to Selenium if it finds nothing.
 
     Args:
         url (str): The URL of the webpage to scrape images from.
         folder (str): The directory path where the images will be saved.
-        MAX (int): The number of times the page will be scrolled.
+        MAX (Optional[int]): The maximum number of pages (HTTP) or scrolls (Selenium), None for no limit.
+        workers (int): Number of concurrent image downloads.
+        resize (Optional[tuple]): Resize images to this (width, height) as they are downloaded.
+        headless (bool): Run Chrome without a window.
+        idle_scrolls (int): Consecutive scrolls without new images before stopping.
+        scroll_timeout (float): Seconds to wait for the page to grow after each scroll.
+        backend (str): "auto", "http" or "selenium".
+
+    Returns:
+        Optional[dict]: The DownloadImages summary, or None if the page could not be scraped.
+    """
+    session = CreateSession(workers)
+    try:
+        fetchers = CreateFetchers(
+            backend, session=session, headless=headless, idle_scrolls=idle_scrolls, scroll_timeout=scroll_timeout
+        )
+    except ValueError:
+        session.close()
+        raise
+    try:
+        urls = ImageURLsWithFallback(fetchers, url, MAX)
+        return DownloadImages(urls, folder, workers=workers, resize=resize, session=session)
+    except Exception as e:
+        logging.error(f"An error occurred while scraping {url}: {e}")
+    finally:
+        session.close()
+
+
+def _QueuedURLs(urls: "queue.Queue") -> Iterator[str]:
+    """Yields URLs from a queue until the None sentinel arrives."""
+    while True:
+        URL = urls.get()
+        if URL is None:
+            return
+        yield URL
+
+
+@Timed()
+def ScrapeBoards(
+    urls: List[str],
+    folder: str,
+    MAX: Optional[int],
+    workers: int = DOWNLOAD_WORKERS,
+    browsers: int = DRIVER_POOL_SIZE,
+    recycle_after: int = DRIVER_RECYCLE_PAGES,
+    resize: Optional[tuple] = None,
+    idle_scrolls: int = IDLE_SCROLLS,
+    scroll_timeout: float = SCROLL_TIMEOUT,
+    backend: str = "auto",
+) -> Optional[dict]:
+    """Scrape several boards at once into one folder.
+
+    Boards are listed concurrently, `browsers` at a time, and every image URL goes onto one
+    shared queue that a single DownloadImages pool drains. Selenium listings borrow headless
+    drivers from a DriverPool, so Chrome starts at most `browsers` times (plus one restart
+    every `recycle_after` pages) instead of once per board.
+
+    Args:
+        urls (List[str]): Board or profile URLs, e.g. the URLS lists of LINKS.
+        folder (str): The directory path where the images will be saved.
+        MAX (Optional[int]): The maximum number of pages (HTTP) or scrolls (Selenium) per board.
+        workers (int): Number of concurrent image downloads.
+        browsers (int): Number of boards listed at once, and the size of the browser pool.
+        recycle_after (int): Pages a browser loads before it is replaced.
+        resize (Optional[tuple]): Resize images to this (width, height) as they are downloaded.
+        idle_scrolls (int): Consecutive scrolls without new images before stopping.
+        scroll_timeout (float): Seconds to wait for the page to grow after each scroll.
+        backend (str): "auto", "http" or "selenium", as in ScrapeImages.
+
+    Returns:
+        Optional[dict]: The DownloadImages summary with a "boards" entry mapping each URL to the
+        number of images listed (or the error message), or None if scraping failed.
     """
-    options = webdriver.ChromeOptions()
-    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    session = CreateSession(workers + browsers)
+    pool = DriverPool(browsers, headless=True, recycle_after=recycle_after)
+    try:
+        fetchers = CreateFetchers(
+            backend, session=session, idle_scrolls=idle_scrolls, scroll_timeout=scroll_timeout, pool=pool
+        )
+    except ValueError:
+        pool.Close()
+        session.close()
+        raise
+    found: "queue.Queue" = queue.Queue()
+    boards: Dict[str, object] = {}
+
+    def ListBoard(url: str) -> None:
+        count = 0
+        try:
+            for URL in ImageURLsWithFallback(fetchers, url, MAX):
+                found.put(URL)
+                count += 1
+            boards[url] = count
+            logging.info(f"Listed {count} images from {url}")
+        except Exception as e:
+            boards[url] = str(e)
+            logging.error(f"Failed to list board {url}: {e}")
+
+    def ListBoards() -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=browsers) as listers:
+                list(listers.map(ListBoard, urls))
+        finally:
+            found.put(None)
 
+    lister = threading.Thread(target=ListBoards, daemon=True)
+    lister.start()
     try:
-        with webdriver.Chrome(options=options) as driver:
-            driver.get(url)
-            for _ in range(MAX):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                logging.info("SCROLLING PAGE")
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "img"))
-                )
-
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            for IMGTAG in soup.find_all("img", src=True):
-                IMGSRC = IMGTAG["src"]
-                logging.info(IMGSRC)
-                if "236x" in IMGSRC:
-                    IMGSRC = IMGSRC.replace("236", "736")
-                    DownloadImage(IMGSRC, folder)
+        summary = DownloadImages(_QueuedURLs(found), folder, workers=workers, resize=resize, session=session)
+        lister.join()
+        summary["boards"] = boards
+        return summary
     except Exception as e:
-        logging.error(f"An error occurred while using the WebDriver: {e}")
+        logging.error(f"An error occurred while scraping boards: {e}")
+    finally:
+        pool.Close()
+        session.close()
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+from typing import Optional
+
+from Workspace import FileLock, JobWorkspace, Publish, WriteAtomic
+
+logging.basicConfig(level=logging.INFO)
+
+TEMPLATES_DIR = "./Templates/"
+MEZZANINE_DIR = os.path.join(TEMPLATES_DIR, ".mezzanine")
+CATALOG_FILE = os.path.join(MEZZANINE_DIR, "catalog.json")
+TEMPLATE_EXTENSIONS = (".mp4", ".mkv", ".avi")
+
+# Normalized templates: bounded resolution, fixed frame rate, one-second GOP without
+# B-frames and x264 fastdecode, so every render decodes a cheap, predictable stream.
+MEZZANINE_SETTINGS = {
+    "max_long_side": 1920,  # Bounds apply to the long and short side, so landscape stays 1080p
+    "max_short_side": 1080,
+    "fps": 30,
+    "gop": 30,
+    "preset": "veryfast",
+    "crf": 16,
+    "audio_bitrate": "192k",
+}
+
+
+def _SettingsVersion() -> str:
+    """Identifies the mezzanine settings so changing them invalidates the catalog."""
+    return hashlib.sha256(json.dumps(MEZZANINE_SETTINGS, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def LoadCatalog() -> dict:
+    """Returns the template catalog, keyed by absolute source path."""
+    try:
+        with open(CATALOG_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _SaveCatalog(catalog: dict) -> None:
+    with WriteAtomic(CATALOG_FILE) as f:
+        json.dump(catalog, f, indent=2)
+
+
+def ProbeVideo(file_path: str) -> dict:
+    """
+    Reads stream and container metadata of a video with ffprobe.
+
+    Returns:
+        dict: width, height, fps, duration, video_codec and audio_codec.
+    """
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            file_path,
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    info = json.loads(result.stdout)
+    video = next((s for s in info["streams"] if s["codec_type"] == "video"), {})
+    audio = next((s for s in info["streams"] if s["codec_type"] == "audio"), {})
+    num, _, den = video.get("avg_frame_rate", "0/1").partition("/")
+    return {
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "fps": float(num) / float(den) if float(den or 0) else None,
+        "duration": float(info["format"].get("duration", 0)),
+        "video_codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name"),
+    }
+
+
+def _IsFresh(entry: dict, template_file: str) -> bool:
+    """Checks that a catalog entry matches the current source file and settings."""
+    stat = os.stat(template_file)
+    return (
+        entry.get("source_size") == stat.st_size
+        and entry.get("source_mtime") == stat.st_mtime
+        and entry.get("settings") == _SettingsVersion()
+        and os.path.isfile(entry.get("mezzanine", ""))
+    )
+
+
+def NormalizeTemplate(template_file: str) -> dict:
+    """
+    Transcodes one template to the mezzanine format and records it in the catalog.
+
+    Parameters:
+        template_file (str): Path to the source template video.
+
+    Returns:
+        dict: The catalog entry, including the mezzanine path and probed metadata.
+    """
+    source = os.path.abspath(template_file)
+    stat = os.stat(source)
+    name = os.path.splitext(os.path.basename(source))[0]
+    digest = hashlib.sha256(f"{source}|{stat.st_size}|{stat.st_mtime}".encode()).hexdigest()[:12]
+    mezzanine = os.path.abspath(os.path.join(MEZZANINE_DIR, f"{name}.{digest}.mp4"))
+    settings = MEZZANINE_SETTINGS
+    source_probe = ProbeVideo(source)
+    max_width, max_height = settings["max_long_side"], settings["max_short_side"]
+    if (source_probe["height"] or 0) > (source_probe["width"] or 0):
+        max_width, max_height = max_height, max_width
+
+    with JobWorkspace(prefix="mezzanine_") as workspace:
+        rendered = os.path.join(workspace, "mezzanine.mp4")
+        command = [
+            "ffmpeg",
+            "-i",
+            source,
+            "-vf",
+            f"scale=w='min(iw,{max_width})':h='min(ih,{max_height})'"
+            ":force_original_aspect_ratio=decrease:force_divisible_by=2",
+            "-r",
+            str(settings["fps"]),
+            "-c:v",
+            "libx264",
+            "-preset",
+            settings["preset"],
+            "-crf",
+            str(settings["crf"]),
+            "-tune",
+            "fastdecode",
+            "-g",
+            str(settings["gop"]),
+            "-bf",
+            "0",
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            "-b:a",
+            settings["audio_bitrate"],
+            "-movflags",
+            "+faststart",
+            "-y",
+            "-loglevel",
+            "error",
+            rendered,
+        ]
+        logging.info(f"Normalizing template: {source}")
+        subprocess.run(command, check=True)
+        Publish(rendered, mezzanine)
+
+    entry = {
+        "mezzanine": mezzanine,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "settings": _SettingsVersion(),
+        "source_probe": source_probe,
+        "probe": ProbeVideo(mezzanine),
+    }
+    with FileLock(f"{CATALOG_FILE}.lock"):
+        catalog = LoadCatalog()
+        previous = catalog.get(source, {}).get("mezzanine")
+        catalog[source] = entry
+        _SaveCatalog(catalog)
+    if previous and previous != mezzanine and os.path.isfile(previous):
+        os.remove(previous)
+    return entry
+
+
+def IngestTemplates(directory: str = TEMPLATES_DIR, force: bool = False) -> dict:
+    """
+    Normalizes every template in a directory that is new, changed or was built with old settings.
+
+    Parameters:
+        directory (str): Directory containing template videos.
+        force (bool): Re-encode templates even if their catalog entry is current.
+
+    Returns:
+        dict: The updated catalog.
+    """
+    os.makedirs(MEZZANINE_DIR, exist_ok=True)
+    catalog = LoadCatalog()
+    for name in sorted(os.listdir(directory)):
+        path = os.path.abspath(os.path.join(directory, name))
+        if not (os.path.isfile(path) and name.lower().endswith(TEMPLATE_EXTENSIONS)):
+            continue
+        entry = catalog.get(path)
+        if not force and entry and _IsFresh(entry, path):
+            logging.info(f"Template already normalized: {name}")
+            continue
+        try:
+            NormalizeTemplate(path)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Failed to normalize template {name}: {e}")
+    return LoadCatalog()
+
+
+def NormalizedTemplate(template_file: str) -> Optional[str]:
+    """
+    Returns the mezzanine copy of a template if one is catalogued and current.
+
+    Parameters:
+        template_file (str): Path to the source template video.
+
+    Returns:
+        Optional[str]: Path of the normalized copy, or None if the template was not ingested.
+    """
+    entry = LoadCatalog().get(os.path.abspath(template_file))
+    if entry and _IsFresh(entry, template_file):
+        return entry["mezzanine"]
+    return None
+
+
+if __name__ == "__main__":
+    IngestTemplates()
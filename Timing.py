@@ -0,0 +1,248 @@
+import argparse
+import collections
+import contextvars
+import functools
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from Workspace import WriteAtomic
+
+logging.basicConfig(level=logging.INFO)
+
+# Finished spans are appended to this JSON lines file when set; every process writes to it,
+# so pool workers and the GUI or CLI that started them end up in one log.
+TIMINGS_ENV = "MEDIAMATE_TIMINGS"
+MAX_RECORDS = 10000  # Finished spans kept in memory per process
+
+_current: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+_records = collections.deque(maxlen=MAX_RECORDS)
+_records_lock = threading.Lock()
+_progress = threading.local()
+
+
+@contextmanager
+def Span(name: str, **attributes) -> Iterator[dict]:
+    """
+    Times a block of work as a named stage.
+
+    Spans nest: a span opened inside another is recorded as "outer/inner". The yielded
+    record can be given extra attributes (e.g. fps) before the block ends. Finished spans
+    are kept in memory and appended to the MEDIAMATE_TIMINGS file when it is set.
+
+    Parameters:
+        name (str): Stage name, e.g. "encode".
+        attributes: Labels stored with the record, e.g. profile="social".
+    """
+    parent = _current.get()
+    record = {
+        "span": f"{parent['span']}/{name}" if parent else name,
+        "name": name,
+        "start": time.time(),
+        "pid": os.getpid(),
+        **attributes,
+    }
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+        record["ok"] = True
+    except BaseException:
+        record["ok"] = False
+        raise
+    finally:
+        record["seconds"] = time.perf_counter() - started
+        _current.reset(token)
+        _Record(record)
+
+
+def Timed(name: Optional[str] = None) -> Callable:
+    """Decorator that runs every call of a function inside a Span named after it."""
+
+    def Decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def Wrapper(*args, **kwargs):
+            with Span(name or function.__name__):
+                return function(*args, **kwargs)
+
+        return Wrapper
+
+    return Decorate
+
+
+def _Record(record: dict) -> None:
+    with _records_lock:
+        _records.append(record)
+    path = os.environ.get(TIMINGS_ENV)
+    if path:
+        try:
+            # One short O_APPEND write per record keeps lines from different processes whole
+            with open(path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            logging.error(f"Failed to write timing record to {path}: {e}")
+
+
+def Records() -> List[dict]:
+    """Returns the spans finished in this process, oldest first."""
+    with _records_lock:
+        return list(_records)
+
+
+def LoadRecords(path: str) -> List[dict]:
+    """Reads span records from a JSON lines file, skipping lines that are cut off."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def Summarize(records: List[dict]) -> Dict[str, dict]:
+    """Aggregates records per span: count, failures, total, mean and max seconds."""
+    summary: Dict[str, dict] = {}
+    for record in records:
+        stats = summary.setdefault(record["span"], {"count": 0, "failed": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["failed"] += not record.get("ok", True)
+        stats["total"] += record["seconds"]
+        stats["max"] = max(stats["max"], record["seconds"])
+        if "fps" in record:
+            stats["fps"] = record["fps"]
+        if "speed" in record:
+            stats["speed"] = record["speed"]
+    for stats in summary.values():
+        stats["mean"] = stats["total"] / stats["count"]
+    return summary
+
+
+def WritePrometheus(path: str, records: Optional[List[dict]] = None) -> None:
+    """
+    Writes per-stage timings in the Prometheus text exposition format, e.g. for node_exporter's
+    textfile collector.
+
+    Parameters:
+        path (str): Output .prom file.
+        records (Optional[List[dict]]): Records to export, defaults to this process's spans.
+    """
+    summary = Summarize(Records() if records is None else records)
+    lines = [
+        "# HELP mediamate_stage_seconds Time spent in each render stage.",
+        "# TYPE mediamate_stage_seconds summary",
+    ]
+    for span, stats in sorted(summary.items()):
+        lines.append(f'mediamate_stage_seconds_sum{{stage="{span}"}} {stats["total"]:.6f}')
+        lines.append(f'mediamate_stage_seconds_count{{stage="{span}"}} {stats["count"]}')
+    lines += ["# HELP mediamate_stage_failures_total Stages that raised.", "# TYPE mediamate_stage_failures_total counter"]
+    lines += [f'mediamate_stage_failures_total{{stage="{span}"}} {stats["failed"]}' for span, stats in sorted(summary.items())]
+    lines += ["# HELP mediamate_encode_fps Frames per second of the last encode.", "# TYPE mediamate_encode_fps gauge"]
+    lines += [f'mediamate_encode_fps{{stage="{span}"}} {stats["fps"]}' for span, stats in sorted(summary.items()) if "fps" in stats]
+    lines += ["# HELP mediamate_encode_speed Encode speed of the last encode relative to real time.", "# TYPE mediamate_encode_speed gauge"]
+    lines += [f'mediamate_encode_speed{{stage="{span}"}} {stats["speed"]}' for span, stats in sorted(summary.items()) if "speed" in stats]
+
+    with WriteAtomic(path) as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@contextmanager
+def ProgressHandler(handler: Callable[[dict], None]) -> Iterator[None]:
+    """Sends progress reports made on this thread to handler while the block runs."""
+    previous = getattr(_progress, "handler", None)
+    _progress.handler = handler
+    try:
+        yield
+    finally:
+        _progress.handler = previous
+
+
+def ReportProgress(event: dict) -> None:
+    """Passes a progress event to the handler installed on this thread, if any."""
+    handler = getattr(_progress, "handler", None)
+    if handler is None:
+        return
+    current = _current.get()
+    if current:
+        event = {"span": current["span"], **event}
+    try:
+        handler(event)
+    except Exception as e:
+        logging.error(f"Progress handler failed: {e}")
+
+
+def _ParseTime(value: str) -> Optional[float]:
+    """Converts an ffmpeg out_time of [-]HH:MM:SS.micro to seconds; it is negative at the start of some encodes."""
+    sign = -1 if value.startswith("-") else 1
+    try:
+        hours, minutes, seconds = value.lstrip("-").split(":")
+        return sign * (int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    except ValueError:
+        return None
+
+
+def RunFFmpeg(command: List[str], duration: Optional[float] = None, name: str = "encode") -> dict:
+    """
+    Runs an ffmpeg command inside a Span and reports its progress.
+
+    "-progress pipe:1 -nostats" is added to the command and the key=value blocks ffmpeg
+    prints about twice a second are parsed into progress events with fps, speed and, when
+    duration is known, the fraction done. The last fps and speed are kept on the span.
+
+    Parameters:
+        command (List[str]): Full ffmpeg command, starting with "ffmpeg".
+        duration (Optional[float]): Expected output length in seconds, for the fraction done.
+        name (str): Span name.
+
+    Returns:
+        dict: The final progress values.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg exits with an error, like subprocess.run(check=True).
+    """
+    command = [command[0], "-progress", "pipe:1", "-nostats", *command[1:]]
+    last: Dict[str, object] = {}
+    with Span(name) as span:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, text=True, bufsize=1) as process:
+            block: Dict[str, str] = {}  # Kept across blocks, so a partial one keeps the last values
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key != "progress":
+                    block[key] = value
+                    continue
+                event: Dict[str, object] = {"state": value}
+                if block.get("fps", "").replace(".", "", 1).isdigit():
+                    event["fps"] = float(block["fps"])
+                if block.get("speed", "").rstrip("x").replace(".", "", 1).isdigit():
+                    event["speed"] = float(block["speed"].rstrip("x"))
+                out_time = _ParseTime(block.get("out_time", ""))
+                if out_time is not None:
+                    out_time = max(out_time, 0.0)
+                    event["out_time"] = out_time
+                    if duration:
+                        event["fraction"] = min(out_time / duration, 1.0)
+                last = event
+                ReportProgress(event)
+            process.wait()
+        span.update({key: last[key] for key in ("fps", "speed") if key in last})
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command)
+    return last
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a MEDIAMATE_TIMINGS file.")
+    parser.add_argument("timings", help="JSON lines file written through MEDIAMATE_TIMINGS")
+    parser.add_argument("--prometheus", help="Also write the summary as a Prometheus text file")
+    args = parser.parse_args()
+    loaded = LoadRecords(args.timings)
+    for span, stats in sorted(Summarize(loaded).items()):
+        print(f"{span:<40} {stats['count']:>5}x {stats['mean']:>8.2f}s mean {stats['max']:>8.2f}s max {stats['failed']:>3} failed")
+    if args.prometheus:
+        WritePrometheus(args.prometheus, loaded)
@@ -1,21 +1,139 @@
-import tempfile
-import shlex
 import logging
 import random
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Union
 from genericpath import isfile
 import re
 import subprocess
 import os
-from Music import GetMusic
+from Encoding import DEFAULT_PROFILE, AspectFilterGraph, AspectSuffix, EncoderArgs, StillFrameRate
+from Music import GetCachedMusic
 from Quote import GetQuote
+from Templates import NormalizedTemplate
+from Timing import RunFFmpeg, Span, Timed
+from Workspace import IMAGE_EXTENSIONS, JobWorkspace, Publish
 from datetime import datetime
 import textwrap
+import threading
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-import easyocr
 
 logging.basicConfig(level=logging.INFO)
-reader = easyocr.Reader(["en"])
+
+
+# Text detection runs on a downscaled copy; captions remain detectable at this size.
+TEXT_CHECK_SIZE = 640
+TEXT_MIN_CONFIDENCE = 0.7  # easyocr text_threshold for a region to count as text
+TEXT_MIN_AREA = 0.005  # Fraction of the image that detected text must cover
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def GetReader():
+    """Returns the shared easyocr reader, building it on first use."""
+    global _reader
+    with _reader_lock:
+        if _reader is None:
+            import easyocr
+
+            _reader = easyocr.Reader(["en"])
+        return _reader
+
+
+def _LoadForTextCheck(image_path: str, max_side: int) -> np.ndarray:
+    """Decodes an image at reduced size as an RGB array for text detection."""
+    with Image.open(image_path) as image:
+        image.draft("RGB", (max_side, max_side))  # Let JPEG decode at a reduced scale
+        image = image.convert("RGB")
+        image.thumbnail((max_side, max_side))
+        return np.asarray(image)
+
+
+def _TextCoverage(horizontal_list: list, free_list: list, shape: tuple) -> float:
+    """Returns the fraction of the image covered by detected text boxes."""
+    area = sum(
+        max(x_max - x_min, 0) * max(y_max - y_min, 0)
+        for x_min, x_max, y_min, y_max in horizontal_list
+    )
+    for points in free_list:
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        area += (max(xs) - min(xs)) * (max(ys) - min(ys))
+    return area / float(shape[0] * shape[1])
+
+
+@Timed()
+def HasText(
+    image_path: str,
+    max_side: int = TEXT_CHECK_SIZE,
+    min_confidence: float = TEXT_MIN_CONFIDENCE,
+    min_area: float = TEXT_MIN_AREA,
+) -> bool:
+    """
+    Checks whether an image already contains text using detection only, without recognition.
+
+    Parameters:
+        image_path (str): Path to the image file.
+        max_side (int): Longest side the image is downscaled to before detection.
+        min_confidence (float): Minimum detector confidence for a text region.
+        min_area (float): Minimum fraction of the image that text must cover.
+
+    Returns:
+        bool: True if text was detected.
+    """
+    image = _LoadForTextCheck(image_path, max_side)
+    horizontal, free = GetReader().detect(
+        image, text_threshold=min_confidence, canvas_size=max_side
+    )
+    return _TextCoverage(horizontal[0], free[0], image.shape) >= min_area
+
+
+def HasTextBatch(
+    directory: str,
+    batch_size: int = 8,
+    max_side: int = TEXT_CHECK_SIZE,
+    min_confidence: float = TEXT_MIN_CONFIDENCE,
+    min_area: float = TEXT_MIN_AREA,
+) -> Dict[str, bool]:
+    """
+    Runs HasText over every image in a directory, batching same-sized images through the detector.
+
+    Parameters:
+        directory (str): Directory containing images, e.g. "./Pictures/No-Text".
+        batch_size (int): Maximum number of images per detector call.
+        max_side (int): Longest side images are downscaled to before detection.
+        min_confidence (float): Minimum detector confidence for a text region.
+        min_area (float): Minimum fraction of the image that text must cover.
+
+    Returns:
+        Dict[str, bool]: Image path to whether it contains text. Unreadable images are omitted.
+    """
+    groups: Dict[tuple, List[tuple]] = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not (isfile(path) and name.lower().endswith(IMAGE_EXTENSIONS)):
+            continue
+        try:
+            image = _LoadForTextCheck(path, max_side)
+        except Exception as e:
+            logging.error(f"Failed to load image {path}: {e}")
+            continue
+        groups.setdefault(image.shape, []).append((path, image))
+
+    results = {}
+    reader = GetReader()
+    for shape, items in groups.items():
+        for i in range(0, len(items), batch_size):
+            chunk = items[i : i + batch_size]
+            horizontal, free = reader.detect(
+                np.stack([image for _, image in chunk]),
+                text_threshold=min_confidence,
+                canvas_size=max_side,
+                reformat=False,
+            )
+            for (path, _), h, f in zip(chunk, horizontal, free):
+                results[path] = _TextCoverage(h, f, shape) >= min_area
+    return results
 
 
 def CleanFilename(filename):
@@ -53,13 +171,30 @@ def FormatQuote(quote: str) -> list:
     return lines
 
 
-def TemplateVideo(quote: str, template_file: str, font_path: str):
+@Timed()
+def TemplateVideo(
+    quote: str,
+    template_file: str,
+    font_path: str,
+    output_dir: str = "./Videos",
+    profile: str = DEFAULT_PROFILE,
+    outputs: Optional[List[str]] = None,
+) -> Optional[Union[str, List[str]]]:
     """
     Creates a video by overlaying text onto the template video, calculating offsets separately for each line.
 
     Parameters:
         quote (str): The text to overlay on the video.
         template_file (str): Path to the template video file.
+        font_path (str): Path to the font file for the quote.
+        output_dir (str): Directory the finished video is published to.
+        profile (str): Render profile from Encoding.PROFILES.
+        outputs (Optional[List[str]]): Aspect ratios from Encoding.ASPECT_RATIOS to render in one
+            ffmpeg run, e.g. ["9:16", "4:5", "1:1"]. By default the template's own size is kept.
+
+    Returns:
+        Optional[Union[str, List[str]]]: Path of the created video, one path per aspect ratio
+            when `outputs` is given, or None on failure.
     """
     try:
         # Validate inputs
@@ -74,6 +209,12 @@ def TemplateVideo(quote: str, template_file: str, font_path: str):
         if not os.path.isfile(font_path):
             raise FileNotFoundError(f"Font file not found: {font_path}")
 
+        # Decode the pre-normalized copy when the template has been ingested
+        normalized_template = NormalizedTemplate(template_file)
+        if normalized_template:
+            logging.info(f"Using normalized template: {normalized_template}")
+            template_file = normalized_template
+
         # Format the quote
         lines = FormatQuote(quote)
 
@@ -106,26 +247,47 @@ def TemplateVideo(quote: str, template_file: str, font_path: str):
 
         # Sanitize the output file name
         sanitized_quote = CleanFilename(quote)
-        output_video = os.path.join(".", "Videos", f"{sanitized_quote}_video.mp4")
-
-        # Construct and execute the FFmpeg command
-        command = [
-            "ffmpeg",
-            "-i",
-            template_file,
-            "-vf",
-            combined_filters,
-            "-codec:a",
-            "copy",
-            "-y",  # Overwrite output file if it exists
-            "-loglevel",
-            "error",
-            output_video,
-        ]
-
-        logging.info(f"Executing ffmpeg command: {' '.join(command)}")
-        subprocess.run(command, check=True)
-        logging.info(f"Video created successfully: {output_video}")
+
+        # Render inside a private workspace and publish the finished files
+        with JobWorkspace(prefix="template_") as workspace:
+            command = [
+                "ffmpeg",
+                "-y",  # Overwrite output file if it exists
+                "-loglevel",
+                "error",
+                "-i",
+                template_file,
+            ]
+            if outputs:
+                # Decode and draw the text once, then split into one encode per aspect ratio
+                filter_graph, labels = AspectFilterGraph(outputs, "0:v", combined_filters)
+                command += ["-filter_complex", filter_graph]
+                names = [f"{sanitized_quote}_video_{AspectSuffix(aspect)}.mp4" for aspect in outputs]
+                maps = [["-map", label, "-map", "0:a?"] for label in labels]
+            else:
+                command += ["-vf", combined_filters]
+                names = [f"{sanitized_quote}_video.mp4"]
+                maps = [[]]
+
+            rendered_videos = []
+            for name, output_map in zip(names, maps):
+                rendered_videos.append(os.path.join(workspace, name))
+                # Template audio is passed through untouched
+                command += [*output_map, *EncoderArgs(profile, audio="copy"), rendered_videos[-1]]
+
+            try:
+                template_duration = GetDuration(template_file)
+            except (subprocess.CalledProcessError, ValueError):
+                template_duration = None  # Progress is still reported, without the fraction done
+
+            logging.info(f"Executing ffmpeg command: {' '.join(command)}")
+            RunFFmpeg(command, template_duration)  # Reports fps, speed and fraction done
+            with Span("publish"):
+                output_videos = [
+                    Publish(path, os.path.join(output_dir, os.path.basename(path))) for path in rendered_videos
+                ]
+        logging.info(f"Video created successfully: {', '.join(output_videos)}")
+        return output_videos if outputs else output_videos[0]
 
     except subprocess.CalledProcessError as e:
         logging.error(f"FFmpeg error: {e}")
@@ -137,7 +299,19 @@ def TemplateVideo(quote: str, template_file: str, font_path: str):
         logging.error(f"Unexpected error: {e}")
 
 
-def PictureVideo(image_path, music_start, music_end, MUSICURL, quote, font_path):
+@Timed()
+def PictureVideo(
+    image_path,
+    music_start,
+    music_end,
+    MUSICURL,
+    quote,
+    font_path,
+    output_dir="./Videos",
+    profile=DEFAULT_PROFILE,
+    outputs=None,
+    quote_source: Optional[Callable[[], str]] = None,
+) -> Optional[Union[str, List[str]]]:
     """
     Creates a video from an image, handling both text and no-text images.
 
@@ -146,8 +320,18 @@ def PictureVideo(image_path, music_start, music_end, MUSICURL, quote, font_path)
         music_start (str): Start time for the music in HH:MM:SS or MM:SS format.
         music_end (str): End time for the music in HH:MM:SS or MM:SS format.
         MUSICURL (str): URL of the music to fetch using GetMusic().
-        quote (str): Text to overlay on the image.
+        quote (str): Text to overlay on the image; fetched per video when None.
         font_path (str): Path to the font file for the quote.
+        output_dir (str): Directory the finished video is published to.
+        profile (str): Render profile from Encoding.PROFILES.
+        outputs (Optional[List[str]]): Aspect ratios from Encoding.ASPECT_RATIOS to render in one
+            ffmpeg run, e.g. ["9:16", "4:5", "1:1"]. By default the image's own size is kept.
+        quote_source (Optional[Callable[[], str]]): Called for the quote when none is given and
+            the image has no text, defaults to GetQuote. Images with text never take a quote.
+
+    Returns:
+        Optional[Union[str, List[str]]]: Path of the created video, one path per aspect ratio
+            when `outputs` is given, or None on failure.
     """
     try:
         # Validate the image file
@@ -158,62 +342,68 @@ def PictureVideo(image_path, music_start, music_end, MUSICURL, quote, font_path)
         ValidateTimeFormat(music_start)
         ValidateTimeFormat(music_end)
 
-        # Get Music and duration
-        duration = GetMusic(MUSICURL, music_start, music_end)
-
-        # Find the generated music file
-        music_file = next((f for f in os.listdir(".") if f.endswith(".mp3")), None)
-        if not music_file:
-            raise FileNotFoundError("Music file not found after GetMusic execution.")
-
-        # Check if the image already has text or not
-
-        imageTEXT = reader.readtext(image_path)
-
-        modified_image_path = image_path  # Default to original image
-        if not imageTEXT:
-            with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as temp_file:
-                modified_image_path = temp_file.name
-
-            quote = quote or GetQuote()
-            OverlayQuote(image_path, quote, modified_image_path, font_path)
-
-        # Generate the video with ffmpeg
-        output_dir = "./Videos"
-        os.makedirs(output_dir, exist_ok=True)
-        output_video = f"{output_dir}/{os.path.splitext(os.path.basename(image_path))[0]}_video.mp4"
-        command = [
-            "ffmpeg",
-            "-loop",
-            "1",  # Loop the image
-            "-i",
-            modified_image_path,  # Input (possibly modified) image
-            "-i",
-            music_file,  # Input music
-            "-c:v",
-            "libx264",  # Video codec
-            "-t",
-            str(duration),  # Video duration
-            "-pix_fmt",
-            "yuvj420p",  # Pixel format for compatibility
-            "-loglevel",
-            "error",  # Only logs errors
-            "-y",  # Overwrites if file already exists
-            output_video,  # Output video
-        ]
-
-        logging.info(f"Executing ffmpeg command: {' '.join(command)}")
-        with subprocess.Popen(command) as process:
-            try:
-                process.wait()
-            except subprocess.CalledProcessError as e:
-                logging.error(f"FFmpeg error: {e}")
-        logging.info(f"Video created successfully: {output_video}")
-
-        # Clean up temporary files
-        if modified_image_path != image_path:
-            os.remove(modified_image_path)
-        os.remove(music_file)
+        # Get Music and duration from the segment cache
+        music = GetCachedMusic(MUSICURL, music_start, music_end)
+        music_file = music["path"]
+        duration = music["duration"]
+
+        image_name = os.path.splitext(os.path.basename(image_path))[0]
+
+        # Intermediate files stay in a private workspace that is removed afterwards
+        with JobWorkspace(prefix="picture_") as workspace:
+            # Check if the image already has text or not
+            modified_image_path = image_path  # Default to original image
+            if not HasText(image_path):
+                modified_image_path = os.path.join(workspace, "overlay.jpg")
+                with Span("quote"):
+                    quote = quote or (quote_source or GetQuote)()
+                OverlayQuote(image_path, quote, modified_image_path, font_path)
+
+            # Generate the video with ffmpeg
+            command = [
+                "ffmpeg",
+                "-loglevel",
+                "error",  # Only logs errors
+                "-y",  # Overwrites if file already exists
+                "-loop",
+                "1",  # Loop the image
+                "-framerate",
+                str(StillFrameRate(profile)),  # Only produce as many frames as the profile needs
+                "-i",
+                modified_image_path,  # Input (possibly modified) image
+                "-i",
+                music_file,  # Input music
+            ]
+            if outputs:
+                # Decode the image once, then split into one encode per aspect ratio
+                filter_graph, labels = AspectFilterGraph(outputs, "0:v")
+                command += ["-filter_complex", filter_graph]
+                names = [f"{image_name}_video_{AspectSuffix(aspect)}.mp4" for aspect in outputs]
+                maps = [["-map", label, "-map", "1:a"] for label in labels]
+            else:
+                names = [f"{image_name}_video.mp4"]
+                maps = [[]]
+
+            rendered_videos = []
+            for name, output_map in zip(names, maps):
+                rendered_videos.append(os.path.join(workspace, name))
+                command += [
+                    *output_map,
+                    *EncoderArgs(profile, still=True),  # Codec, preset, CRF, GOP and audio settings
+                    "-t",
+                    str(duration),  # Video duration
+                    "-shortest",  # Stop with the music
+                    rendered_videos[-1],  # Output video
+                ]
+
+            logging.info(f"Executing ffmpeg command: {' '.join(command)}")
+            RunFFmpeg(command, duration)  # Reports fps, speed and fraction done
+            with Span("publish"):
+                output_videos = [
+                    Publish(path, os.path.join(output_dir, os.path.basename(path))) for path in rendered_videos
+                ]
+        logging.info(f"Video created successfully: {', '.join(output_videos)}")
+        return output_videos if outputs else output_videos[0]
 
     except subprocess.CalledProcessError as e:
         logging.error(f"FFmpeg error: {e}")
@@ -225,6 +415,7 @@ def PictureVideo(image_path, music_start, music_end, MUSICURL, quote, font_path)
         logging.error(f"An unexpected error occurred: {e}")
 
 
+@Timed()
 def OverlayQuote(image_path: str, quote: str, output_path: str, font_path: str) -> None:
     """
     Overlays a quote onto an image and saves it to a new file.
@@ -310,7 +501,7 @@ def GetDuration(file_path, timeout=None):
                 "format=duration",
                 "-of",
                 "default=noprint_wrappers=1:nokey=1",
-                shlex.quote(file_path),
+                file_path,
             ],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -0,0 +1,248 @@
+import ctypes
+import ctypes.util
+import functools
+import logging
+import os
+import queue
+import select
+import shutil
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from Jobs import CANCELLED, DONE, FINISHED, AskParent, JobExecutor
+from Workspace import IMAGE_EXTENSIONS
+
+logging.basicConfig(level=logging.INFO)
+
+INBOX_DIR = "./Pictures/Inbox"
+ARCHIVE_DIR = "./Pictures/Archive"
+FAILED_DIR = "./Pictures/Failed"
+WATCH_DEBOUNCE = 1.0  # Seconds a file must stay unchanged before it is processed
+WATCH_POLL_INTERVAL = 1.0  # Seconds between directory scans when inotify is unavailable
+WATCH_WORKERS = 2  # Pictures rendered at once
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """Reports files written or moved into a directory, using Linux inotify through libc."""
+
+    def __init__(self, directory: str):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def Changes(self, timeout: float) -> Set[str]:
+        """Waits up to timeout seconds and returns the names of files that were written or moved in."""
+        names = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return names
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def Close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Reports new or changed files by rescanning a directory, for systems without inotify."""
+
+    def __init__(self, directory: str, interval: float = WATCH_POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._seen = self._Scan()
+
+    def _Scan(self) -> Dict[str, tuple]:
+        with os.scandir(self.directory) as it:
+            return {entry.name: (entry.stat().st_size, entry.stat().st_mtime) for entry in it if entry.is_file()}
+
+    def Changes(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.interval))
+        current = self._Scan()
+        changed = {name for name, stat in current.items() if self._seen.get(name) != stat}
+        self._seen = current
+        return changed
+
+    def Close(self) -> None:
+        pass
+
+
+def CreateWatcher(directory: str, polling: bool = False):
+    """Returns an InotifyWatcher, or a PollingWatcher when polling is forced or inotify is unavailable."""
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}), polling {directory} instead")
+    return PollingWatcher(directory)
+
+
+def _MoveAside(path: str, directory: str) -> str:
+    """Moves a file into a directory, adding a timestamp if the name is taken."""
+    os.makedirs(directory, exist_ok=True)
+    destination = os.path.join(directory, os.path.basename(path))
+    if os.path.exists(destination):
+        stem, extension = os.path.splitext(os.path.basename(path))
+        destination = os.path.join(directory, f"{stem}_{int(time.time())}{extension}")
+    shutil.move(path, destination)
+    return destination
+
+
+def WatchInbox(
+    music_url: str,
+    music_start: str,
+    music_end: str,
+    inbox: str = INBOX_DIR,
+    archive: str = ARCHIVE_DIR,
+    failed: str = FAILED_DIR,
+    output_dir: str = "./Videos",
+    font_path: str = "Roboto-Medium.ttf",
+    quote: Optional[str] = None,
+    profile: str = "social",
+    outputs: Optional[List[str]] = None,
+    workers: int = WATCH_WORKERS,
+    debounce: float = WATCH_DEBOUNCE,
+    polling: bool = False,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Turns every image dropped into the inbox into a picture video until stopped.
+
+    Images already in the inbox are processed first. New files are picked up through
+    inotify (or by polling) once they have been unchanged for `debounce` seconds, then
+    rendered by PictureVideo, which checks for text, overlays a quote when there is none,
+    and encodes the video into output_dir. Up to `workers` renders run at once in
+    separate processes. Sources are moved to the archive on success and to the failed
+    folder otherwise, so a bad image is never retried in a loop.
+
+    Parameters:
+        music_url (str): YouTube URL of the music used for every video.
+        music_start (str): Music start time in HH:MM:SS or MM:SS format.
+        music_end (str): Music end time in HH:MM:SS or MM:SS format.
+        inbox (str): Folder to watch, e.g. the folder the scraper downloads into.
+        archive (str): Folder processed sources are moved to.
+        failed (str): Folder sources that could not be rendered are moved to.
+        output_dir (str): Folder the videos are published to.
+        font_path (str): Font for the quote overlay.
+        quote (Optional[str]): Quote for every image without text; fetched per video when None.
+        profile (str): Render profile from Encoding.PROFILES.
+        outputs (Optional[List[str]]): Aspect ratios to render, as in PictureVideo.
+        workers (int): Maximum concurrent renders.
+        debounce (float): Seconds a file must stay unchanged before it is processed.
+        polling (bool): Poll the inbox even if inotify is available.
+        stop (Optional[threading.Event]): Set to stop watching; runs until interrupted otherwise.
+    """
+    from Quote import GetQuote
+    from Video import PictureVideo
+
+    os.makedirs(inbox, exist_ok=True)
+    stop = stop or threading.Event()
+    pending: Dict[str, tuple] = {}  # name -> (last change seen, size, mtime)
+    in_flight: Set[str] = set()
+    sources: Dict[int, str] = {}  # job id -> inbox path of the picture it renders
+    finished: "queue.Queue" = queue.Queue()  # Finished jobs whose picture is still in the inbox
+
+    def Finished(job) -> None:
+        if job.status in FINISHED:
+            finished.put(job)
+
+    def Settle() -> None:
+        """Moves the pictures of finished jobs out of the inbox. Runs on the watching thread."""
+        while True:
+            try:
+                job = finished.get_nowait()
+            except queue.Empty:
+                return
+            path = sources.pop(job.id)
+            in_flight.discard(os.path.basename(path))
+            if job.status == CANCELLED:
+                continue  # Dropped at shutdown: leave the image in the inbox for the next run
+            succeeded = job.status == DONE and job.result is not None
+            try:
+                moved = _MoveAside(path, archive if succeeded else failed)
+                logging.info(f"{'Rendered' if succeeded else 'Failed to render'} {path}, moved to {moved}")
+            except OSError as e:
+                logging.error(f"Failed to move {path} out of the inbox: {e}")
+
+    executor = JobExecutor(threads=1, processes=workers, notify=Finished)
+    watcher = CreateWatcher(inbox, polling)
+    logging.info(f"Watching {inbox} with {type(watcher).__name__}, {workers} workers")
+
+    def Note(name: str) -> None:
+        if name.lower().endswith(IMAGE_EXTENSIONS) and name not in in_flight:
+            pending[name] = (time.monotonic(), None, None)
+
+    with os.scandir(inbox) as it:
+        for entry in it:
+            if entry.is_file():
+                Note(entry.name)
+
+    try:
+        while not stop.is_set():
+            for name in watcher.Changes(min(debounce, 0.5) if pending else 1.0):
+                Note(name)
+            Settle()
+
+            now = time.monotonic()
+            for name, (changed, size, mtime) in list(pending.items()):
+                path = os.path.join(inbox, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    del pending[name]
+                    continue
+                if (stat.st_size, stat.st_mtime) != (size, mtime):
+                    # Still being written: restart the debounce window
+                    pending[name] = (now, stat.st_size, stat.st_mtime)
+                    continue
+                if now - changed < debounce:
+                    continue
+                del pending[name]
+                in_flight.add(name)
+                logging.info(f"Queueing {path}")
+                job = executor.Submit(
+                    f"Picture: {name}",
+                    PictureVideo,
+                    path, music_start, music_end, music_url,
+                    quote, font_path, output_dir=output_dir, profile=profile, outputs=outputs,
+                    # Only images without text ask for a quote, from this process's prefetcher
+                    quote_source=functools.partial(AskParent, "quote"),
+                    kind="process",
+                    providers={"quote": GetQuote},
+                )
+                sources[job.id] = path
+    except KeyboardInterrupt:
+        logging.info("Stopping inbox watcher")
+    finally:
+        watcher.Close()
+        executor.Shutdown(wait=True)
+        Settle()
@@ -0,0 +1,128 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Job directories live beside the outputs so finished files can be renamed into place.
+WORKSPACE_ROOT = "./Cache/Jobs"
+LOCK_STALE_SECONDS = 30 * 60  # A lock file older than this is assumed abandoned
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff")  # Files treated as pictures everywhere
+
+_thread_locks: dict = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def JobWorkspace(prefix: str = "job_"):
+    """
+    Creates a private working directory for one job and removes it when the job ends.
+
+    Every intermediate file a job writes belongs in its workspace, so concurrent jobs in
+    any thread or process never see or delete each other's files.
+
+    Parameters:
+        prefix (str): Prefix for the directory name, useful when debugging.
+
+    Yields:
+        str: Path to the empty workspace directory.
+    """
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    path = tempfile.mkdtemp(prefix=prefix, dir=WORKSPACE_ROOT)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def WriteAtomic(path: str, mode: str = "w"):
+    """
+    Opens a temporary file that replaces `path` in one step when the block completes.
+
+    Readers of `path` see either the previous file or the complete new one. If the block
+    raises, the temporary file is removed and `path` is left as it was.
+
+    Parameters:
+        path (str): Destination file; its directory is created if needed.
+        mode (str): "w" for text or "wb" for bytes.
+
+    Yields:
+        file: The open temporary file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, mode) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def Publish(source: str, destination: str) -> str:
+    """
+    Moves a finished file into its final location in one step.
+
+    Readers of the destination see either the previous file or the complete new one,
+    never a partially written file.
+
+    Returns:
+        str: The destination path.
+    """
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    try:
+        os.replace(source, destination)
+    except OSError:
+        # Source and destination are on different filesystems
+        with WriteAtomic(destination, "wb") as f, open(source, "rb") as source_file:
+            shutil.copyfileobj(source_file, f)
+        os.remove(source)
+    return destination
+
+
+@contextmanager
+def FileLock(path: str, poll: float = 0.2):
+    """
+    Holds an exclusive lock on `path` across threads and processes.
+
+    The lock is a file created with O_EXCL next to the resource. Lock files older than
+    LOCK_STALE_SECONDS are treated as left behind by a crashed process and removed.
+
+    Parameters:
+        path (str): Lock file path.
+        poll (float): Seconds between attempts while the lock is held elsewhere.
+    """
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    with thread_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        while True:
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                        logging.warning(f"Removing stale lock: {path}")
+                        os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(poll)
+        try:
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
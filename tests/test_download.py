@@ -0,0 +1,148 @@
+import collections
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Manifest import ScrapeManifest  # noqa: E402
+from Scraper import CreateSession, DownloadImages  # noqa: E402
+
+SLOW_RESPONSE = 0.2  # Seconds every image takes, so concurrent requests overlap
+TIMEOUT = (2, 0.5)  # (connect, read) used by the tests; "stall" outlasts the read timeout
+
+
+class ImageServer(ThreadingHTTPServer):
+    """
+    Local image host with scripted failures.
+
+    /img/<n>.png serves distinct bytes after SLOW_RESPONSE. /flaky/<n>.png answers 503 on the
+    first request, /stall/<n>.png stalls past the read timeout on the first request,
+    /missing.png is a 404 and /down.png always answers 500.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ImageHandler)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.hits = collections.Counter()
+        self.connections = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is visible
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+            hits = server.hits[self.path]
+            server.connections.add(self.client_address)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(SLOW_RESPONSE)
+            if self.path == "/missing.png":
+                return self._Send(404)
+            if self.path == "/down.png":
+                return self._Send(500)
+            if self.path.startswith("/flaky/") and hits == 1:
+                return self._Send(503)
+            if self.path.startswith("/stall/") and hits == 1:
+                time.sleep(TIMEOUT[1] * 3)
+            self._Send(200, f"image bytes of {self.path}".encode())
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _Send(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ImageServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = ScrapeManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.Close()
+
+
+def _Download(server, urls, folder, manifest, **options):
+    options = {"timeout": TIMEOUT, "backoff": 0.01, "dedupe": False, **options}
+    return DownloadImages([f"{server.base_url}{url}" for url in urls], str(folder), manifest=manifest, **options)
+
+
+def test_requests_per_host_are_bounded(server, tmp_path, manifest):
+    summary = _Download(server, [f"/img/{n}.png" for n in range(8)], tmp_path, manifest, workers=8, per_host=2)
+    assert summary["downloaded"] == 8
+    assert server.max_active == 2
+
+
+def test_server_errors_and_timeouts_are_retried(server, tmp_path, manifest):
+    summary = _Download(server, ["/flaky/1.png", "/stall/1.png"], tmp_path, manifest, retries=2)
+    assert summary["downloaded"] == 2 and summary["failed"] == 0
+    assert server.hits["/flaky/1.png"] == 2
+    assert server.hits["/stall/1.png"] == 2
+
+
+def test_client_errors_fail_without_retry(server, tmp_path, manifest):
+    summary = _Download(server, ["/missing.png", "/down.png"], tmp_path, manifest, retries=2)
+    assert server.hits["/missing.png"] == 1
+    assert server.hits["/down.png"] == 3
+    assert summary["failed"] == 2
+    assert set(summary["errors"]) == {f"{server.base_url}/missing.png", f"{server.base_url}/down.png"}
+
+
+def test_shared_session_reuses_connections(server, tmp_path, manifest):
+    session = CreateSession(2)
+    try:
+        urls = [f"/img/{n}.png" for n in range(6)]
+        _Download(server, urls, tmp_path / "first", manifest, workers=2, per_host=2, session=session)
+        _Download(server, [f"/img/{n}.png" for n in range(6, 12)], tmp_path / "second", manifest, workers=2, per_host=2, session=session)
+    finally:
+        session.close()
+    assert sum(server.hits.values()) == 12
+    assert len(server.connections) <= 2
+
+
+def test_summary_counts_every_outcome(server, tmp_path, manifest):
+    urls = ["/img/1.png", "/img/1.png", "/img/2.png", "/missing.png", "/page.html"]
+    summary = _Download(server, urls, tmp_path, manifest, retries=0)
+    assert summary["requested"] == 4  # The repeated URL is only counted once
+    assert summary["downloaded"] == 2
+    assert summary["failed"] == 1
+    assert summary["invalid"] == 1
+    assert summary["bytes"] == sum(len(f"image bytes of /img/{n}.png") for n in (1, 2))
+    assert sorted(os.path.dirname(path) for path in summary["paths"]) == [str(tmp_path)] * 2
+    assert all(os.path.isfile(path) for path in summary["paths"])
+
+    again = _Download(server, urls, tmp_path, manifest, retries=0)
+    assert again["unchanged"] == 2 and again["downloaded"] == 0
+    assert server.hits["/img/1.png"] == 1
@@ -0,0 +1,169 @@
+import json
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Fetchers import (  # noqa: E402
+    FETCHERS,
+    CreateFetchers,
+    Fetcher,
+    ImageURLsWithFallback,
+    PinterestHTTPFetcher,
+    SeleniumFetcher,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pinterest")
+
+
+class RecordedResponse:
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self.payload
+
+
+class RecordedSession:
+    """
+    Serves recorded resource responses instead of calling Pinterest.
+
+    The n-th call to a resource returns fixtures/pinterest/<resource>.<n>.json, or
+    <resource>.json for single-page resources. Every call is kept in `calls`.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._pages = Counter()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        resource = url.rstrip("/").split("/")[-2]
+        self._pages[resource] += 1
+        self.calls.append((resource, json.loads(params["data"])["options"]))
+        path = os.path.join(FIXTURES_DIR, f"{resource}.{self._pages[resource]}.json")
+        if not os.path.isfile(path):
+            path = os.path.join(FIXTURES_DIR, f"{resource}.json")
+        with open(path) as f:
+            return RecordedResponse(json.load(f))
+
+    def close(self) -> None:
+        pass
+
+
+class StaticFetcher(Fetcher):
+    def __init__(self, name, urls=(), error=None, matches=True):
+        self.name = name
+        self.urls = list(urls)
+        self.error = error
+        self.matches = matches
+        self.listed = []
+
+    def Matches(self, url):
+        return self.matches
+
+    def ImageURLs(self, url, max_pages=None):
+        self.listed.append(url)
+        yield from self.urls
+        if self.error:
+            raise self.error
+
+
+@pytest.fixture
+def session():
+    return RecordedSession()
+
+
+def test_board_pages_follow_bookmark_until_end(session):
+    fetcher = PinterestHTTPFetcher(session)
+    urls = list(fetcher.ImageURLs("https://www.pinterest.com/mediamate/quotes/"))
+    assert urls == [
+        "https://i.pinimg.com/736x/aa/01/aa01.jpg",
+        "https://i.pinimg.com/originals/aa/02/aa02.png",
+        "https://i.pinimg.com/736x/aa/04/aa04.jpg",
+    ]
+    assert [resource for resource, _ in session.calls] == ["BoardResource", "BoardFeedResource", "BoardFeedResource"]
+    assert session.calls[1][1] == {"board_id": "549650766325001234", "page_size": 25}
+    assert session.calls[2][1]["bookmarks"] == ["Y2JVSG81V2sxcmNHRlpWM1J"]
+
+
+def test_max_pages_stops_paging(session):
+    fetcher = PinterestHTTPFetcher(session)
+    urls = list(fetcher.ImageURLs("https://www.pinterest.com/mediamate/quotes/", max_pages=1))
+    assert len(urls) == 2
+    assert [resource for resource, _ in session.calls] == ["BoardResource", "BoardFeedResource"]
+
+
+def test_created_pins_use_activity_feed_and_legacy_bookmarks(session):
+    fetcher = PinterestHTTPFetcher(session)
+    urls = list(fetcher.ImageURLs("https://in.pinterest.com/mediamate/_created/"))
+    assert urls == ["https://i.pinimg.com/736x/bb/01/bb01.jpg", "https://i.pinimg.com/736x/bb/02/bb02.jpg"]
+    assert [resource for resource, _ in session.calls] == ["UserActivityPinsResource"] * 2
+    assert session.calls[1][1]["bookmarks"] == ["P2MkMjAyMy0wNS0wMVQxMjowMDowMC4wMDAwMDB8"]
+
+
+@pytest.mark.parametrize("path", ["/mediamate/", "/mediamate/_saved/", "/mediamate/pins/"])
+def test_saved_pins_use_user_pins(session, path):
+    fetcher = PinterestHTTPFetcher(session)
+    urls = list(fetcher.ImageURLs(f"https://www.pinterest.com{path}"))
+    assert urls == ["https://i.pinimg.com/736x/cc/01/cc01.jpg"]
+    assert session.calls == [("UserPinsResource", {"username": "mediamate", "page_size": 25})]
+
+
+def test_matches_pinterest_hosts_only(session):
+    fetcher = PinterestHTTPFetcher(session)
+    assert fetcher.Matches("https://in.pinterest.com/mediamate/_created/")
+    assert not fetcher.Matches("https://example.com/gallery/")
+
+
+def test_fetcher_is_abstract():
+    with pytest.raises(TypeError):
+        Fetcher()
+
+
+def test_create_fetchers_uses_registry_order(session):
+    fetchers = CreateFetchers("auto", session=session, idle_scrolls=1)
+    assert [type(fetcher) for fetcher in fetchers] == list(FETCHERS.values())
+    assert fetchers[0].session is session
+    assert fetchers[1].idle_scrolls == 1
+
+
+def test_create_fetchers_single_backend(session):
+    (fetcher,) = CreateFetchers("selenium", session=session)
+    assert isinstance(fetcher, SeleniumFetcher)
+
+
+def test_create_fetchers_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        CreateFetchers("curl")
+
+
+def test_fallback_skips_empty_and_failing_fetchers():
+    empty = StaticFetcher("empty")
+    failing = StaticFetcher("failing", error=RuntimeError("blocked"))
+    unmatched = StaticFetcher("unmatched", ["skipped"], matches=False)
+    last = StaticFetcher("last", ["a", "b"])
+    urls = list(ImageURLsWithFallback([empty, failing, unmatched, last], "https://example.com/board/"))
+    assert urls == ["a", "b"]
+    assert unmatched.listed == []
+
+
+def test_fallback_stops_at_first_productive_fetcher():
+    first = StaticFetcher("first", ["a"])
+    last = StaticFetcher("last", ["b"])
+    assert list(ImageURLsWithFallback([first, last], "https://example.com/board/")) == ["a"]
+    assert last.listed == []
+
+
+def test_fallback_propagates_errors_after_producing():
+    first = StaticFetcher("first", ["a"], error=RuntimeError("page 2 failed"))
+    last = StaticFetcher("last", ["b"])
+    listing = ImageURLsWithFallback([first, last], "https://example.com/board/")
+    assert next(listing) == "a"
+    with pytest.raises(RuntimeError):
+        next(listing)
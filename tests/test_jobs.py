@@ -0,0 +1,57 @@
+import functools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Jobs import DONE, FAILED, AskParent, JobExecutor  # noqa: E402
+
+
+@pytest.fixture
+def executor():
+    executor = JobExecutor(threads=1, processes=1)
+    yield executor
+    executor.Shutdown(wait=True)
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_provider_runs_in_submitting_process_when_asked(executor, kind):
+    asked = []
+
+    def Provide():
+        asked.append(os.getpid())
+        return "quote"
+
+    job = executor.Submit("ask", functools.partial(AskParent, "quote"), kind=kind, providers={"quote": Provide})
+    job.Wait(60)
+    assert job.status == DONE and job.result == "quote"
+    assert asked == [os.getpid()]
+
+
+def test_provider_is_not_called_unless_asked(executor):
+    asked = []
+    job = executor.Submit("skip", os.getpid, kind="process", providers={"quote": lambda: asked.append(1)})
+    job.Wait(60)
+    assert job.status == DONE and job.result != os.getpid()
+    assert asked == []
+
+
+def test_provider_failure_fails_the_job(executor):
+    def Provide():
+        raise RuntimeError("quote API down")
+
+    job = executor.Submit("fail", functools.partial(AskParent, "quote"), kind="process", providers={"quote": Provide})
+    job.Wait(60)
+    assert job.status == FAILED
+    assert "quote API down" in str(job.error)
+    # The worker is still usable afterwards
+    job = executor.Submit("again", functools.partial(AskParent, "quote"), kind="process", providers={"quote": lambda: "ok"})
+    job.Wait(60)
+    assert job.result == "ok"
+
+
+def test_ask_parent_outside_a_job():
+    with pytest.raises(RuntimeError):
+        AskParent("quote")
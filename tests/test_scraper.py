@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+import Scraper  # noqa: E402
+from Dedupe import DHash, PictureIndex  # noqa: E402
+from Manifest import ScrapeManifest  # noqa: E402
+from Scraper import _FetchImage  # noqa: E402
+
+IMAGE_URL = "https://i.pinimg.com/736x/aa/01/aa01.jpg"
+IMAGE_BYTES = b"\xff\xd8\xff\xe0 not really a jpeg"
+
+
+class CannedResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+
+class CannedSession:
+    """Answers requests with the given status codes in order and records the headers sent."""
+
+    def __init__(self, *status_codes: int):
+        self.status_codes = list(status_codes)
+        self.content = IMAGE_BYTES
+        self.sent = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent.append(dict(headers or {}))
+        status = self.status_codes.pop(0)
+        return CannedResponse(status, self.content if status == 200 else b"", {"ETag": '"v1"'})
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = ScrapeManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.Close()
+
+
+def _Stored(manifest, folder):
+    digest = hashlib.sha256(IMAGE_BYTES).hexdigest()
+    path = os.path.join(folder, f"{digest}.jpg")
+    manifest.Put(folder, IMAGE_URL, digest, path, '"v1"', None)
+    return path
+
+
+def test_not_modified_reuses_stored_copy(tmp_path, manifest):
+    folder = str(tmp_path / "images")
+    os.makedirs(folder)
+    path = _Stored(manifest, folder)
+    with open(path, "wb") as f:
+        f.write(IMAGE_BYTES)
+    session = CannedSession(304)
+    assert _FetchImage(IMAGE_URL, folder, session, 5, manifest) == (path, 0, "not_modified")
+    assert session.sent == [{"If-None-Match": '"v1"'}]
+
+
+def test_not_modified_without_stored_file_downloads_again(tmp_path, manifest):
+    folder = str(tmp_path / "images")
+    path = _Stored(manifest, folder)  # Recorded, but the file was deleted
+    session = CannedSession(304, 200)
+    assert _FetchImage(IMAGE_URL, folder, session, 5, manifest) == (path, len(IMAGE_BYTES), "downloaded")
+    assert session.sent == [{}, {}]
+    assert os.path.isfile(path)
+
+
+def test_not_modified_without_manifest_entry_is_an_error(tmp_path, manifest):
+    session = CannedSession(304, 304)
+    with pytest.raises(requests.HTTPError):
+        _FetchImage(IMAGE_URL, str(tmp_path / "images"), session, 5, manifest)
+    assert session.sent == [{}, {}]
+
+
+def _PNG(color) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_failed_write_leaves_no_index_entry(tmp_path, manifest, monkeypatch):
+    folder = str(tmp_path / "images")
+    index = PictureIndex(folder)
+    content = _PNG("red")
+    session = CannedSession(200)
+    session.content = content
+
+    def FailingResize(content, size):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(Scraper, "ResizeBytes", FailingResize)
+    with pytest.raises(OSError):
+        _FetchImage("https://example.com/a.png", folder, session, 5, manifest, index, resize=(32, 32))
+    assert index.FindDuplicate(DHash(content)) is None
+    assert not os.listdir(folder)